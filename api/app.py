@@ -1,8 +1,13 @@
 from flask import Flask
 from flask_cors import CORS
+from flask_compress import Compress
 from werkzeug.exceptions import MethodNotAllowed
-from extensions import db
+from extensions import db, migrate
+from commands import register_commands
 from error_handler import handle_exception, handle_api_error, method_not_allowed_error
+from json_provider import FastJSONProvider
+from db_pool import engine_options, install_pool_events
+from db_routing import replica_binds, init_replicas
 import os
 
 # Enregistrement des Blueprints
@@ -14,34 +19,66 @@ from routes.franchises import franchises_bp
 from routes.genres import genres_bp
 from routes.persons import persons_bp
 from routes.search import search_bp
+from routes.metrics import metrics_bp
 
-app = Flask(__name__)
-CORS(app)
+def create_app(config=None):
+    """
+    Fabrique de l'application : utilisée par gunicorn (gunicorn.conf.py), par la commande flask
+    (flask --app app db upgrade) et par python app.py en développement
+    config : clés qui remplacent la configuration lue dans l'environnement (tests : base de test)
+    """
+    app = Flask(__name__)
+    # encodeur JSON rapide (orjson) pour toutes les réponses, cf json_provider.py
+    app.json = FastJSONProvider(app)
+    CORS(app)
 
-#Si la méthode n'existe pas pour le chemin
-@app.errorhandler(MethodNotAllowed)
-def handle_method_not_allowed(error):
-    return handle_api_error(method_not_allowed_error("Méthode non trouvée pour cette ressource"))
+    # compression brotli / gzip selon l'Accept-Encoding du client, au-dessus de COMPRESS_MIN_SIZE octets
+    # (en dessous le gain ne vaut pas le CPU), les réponses en streaming sont compressées au fil de l'eau
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+    app.config['COMPRESS_BR_LEVEL'] = int(os.getenv('COMPRESS_BR_LEVEL', 4))
+    Compress(app)
 
-#Erreur générique qui ne serais pas traité
-@app.errorhandler(Exception)
-def handle_generic_error(e):
-    return handle_exception(e)
+    #Si la méthode n'existe pas pour le chemin
+    @app.errorhandler(MethodNotAllowed)
+    def handle_method_not_allowed(error):
+        return handle_api_error(method_not_allowed_error("Méthode non trouvée pour cette ressource"))
 
-# Connexion à la base de données
-app.config['SQLALCHEMY_DATABASE_URI'] = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('PORT_POSTGRES')}/{os.getenv('POSTGRES_DB')}"
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    #Erreur générique qui ne serais pas traité
+    @app.errorhandler(Exception)
+    def handle_generic_error(e):
+        return handle_exception(e)
 
-db.init_app(app)
+    # Connexion à la base de données
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('PORT_POSTGRES')}/{os.getenv('POSTGRES_DB')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # taille du pool, recyclage, pre-ping, statement_timeout, mode PgBouncer : cf db_pool.py
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options()
+    # réplicas en lecture (optionnels), mêmes options de pool, cf db_routing.py
+    app.config['SQLALCHEMY_BINDS'] = replica_binds()
+    app.config.update(config or {})
 
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(media_bp, url_prefix='/api/media')
-app.register_blueprint(libraries_bp, url_prefix='/api/libraries')
-app.register_blueprint(users_bp, url_prefix='/api/users')
-app.register_blueprint(franchises_bp, url_prefix='/api/franchises')
-app.register_blueprint(genres_bp, url_prefix='/api/genres')
-app.register_blueprint(persons_bp, url_prefix='/api/persons')
-app.register_blueprint(search_bp, url_prefix='/api/search')
+    db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            install_pool_events(engine)
+    init_replicas(app, db)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(__file__), 'migrations'))
+    register_commands(app)
+
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(media_bp, url_prefix='/api/media')
+    app.register_blueprint(libraries_bp, url_prefix='/api/libraries')
+    app.register_blueprint(users_bp, url_prefix='/api/users')
+    app.register_blueprint(franchises_bp, url_prefix='/api/franchises')
+    app.register_blueprint(genres_bp, url_prefix='/api/genres')
+    app.register_blueprint(persons_bp, url_prefix='/api/persons')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
+    return app
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=os.getenv('PORT_API'), debug=True)
\ No newline at end of file
+    # serveur de développement flask, en production c'est gunicorn (cf gunicorn.conf.py)
+    create_app().run(host='0.0.0.0', port=os.getenv('PORT_API'), debug=os.getenv('FLASK_DEBUG', '1') == '1')
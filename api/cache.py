@@ -0,0 +1,86 @@
+import time
+import threading
+from collections import OrderedDict
+
+"""
+Cache mémoire simple pour l'api :
+TTLCache garde au plus max_size entrées (les moins récemment utilisées sortent en premier)
+et chaque entrée expire après ttl secondes, avec des compteurs hits / misses pour le dimensionner
+
+Invalidation par compteurs de génération : chaque écriture incrémente la génération de sa table
+(bump_generation('media')) et les clés de cache contiennent les générations dont elles dépendent,
+les anciennes entrées ne sont donc plus jamais lues et sortent par le LRU ou le TTL
+
+Le cache est propre à chaque processus (pas de partage entre workers) : une écriture traitée par
+un autre worker n'est vue qu'à l'expiration du TTL
+"""
+
+_generations = {}
+_generations_lock = threading.Lock()
+
+
+def bump_generation(*tables):
+    """à appeler après le commit d'une écriture sur ces tables"""
+    with _generations_lock:
+        for table in tables:
+            _generations[table] = _generations.get(table, 0) + 1
+
+
+def get_generations(*tables):
+    return tuple(_generations.get(table, 0) for table in tables)
+
+
+class TTLCache:
+    def __init__(self, max_size=256, ttl=30):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Retourne la valeur en cache ou None si absente / expirée"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            # on retire les plus anciennes entrées si on dépasse la taille max
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 3) if total else None
+            }
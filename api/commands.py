@@ -0,0 +1,66 @@
+import sys
+import click
+from sqlalchemy import inspect
+from extensions import db
+
+"""
+Commandes flask en plus de celles de Flask-Migrate (flask --app app <commande>)
+
+check-fk-indexes : échoue (code 1) si une clé étrangère n'est le début d'aucun index
+(index, clé primaire ou contrainte unique), sur les modèles ou avec --database sur la base réelle
+"""
+
+
+def _missing(tables):
+    """
+    tables : {table: (clés étrangères, colonnes de chaque index)} avec des listes de noms de colonnes
+    Retourne [(table, colonnes)] des clés étrangères sans index qui commence par leurs colonnes
+    """
+    manquants = []
+    for table, (foreign_keys, indexes) in sorted(tables.items()):
+        for columns in foreign_keys:
+            if not any(index[:len(columns)] == columns for index in indexes):
+                manquants.append((table, columns))
+    return manquants
+
+
+def missing_fk_indexes_models():
+    tables = {}
+    for table in db.metadata.sorted_tables:
+        indexes = [[column.name for column in index.columns] for index in table.indexes]
+        indexes.append([column.name for column in table.primary_key.columns])
+        indexes += [
+            [column.name for column in constraint.columns]
+            for constraint in table.constraints if constraint.__class__.__name__ == 'UniqueConstraint'
+        ]
+        indexes += [[column.name] for column in table.columns if column.unique]
+        foreign_keys = [[column.name for column in fk.columns] for fk in table.foreign_key_constraints]
+        tables[table.name] = (foreign_keys, indexes)
+    return _missing(tables)
+
+
+def missing_fk_indexes_database():
+    inspector = inspect(db.engine)
+    tables = {}
+    for table in inspector.get_table_names():
+        indexes = [index['column_names'] for index in inspector.get_indexes(table)]
+        indexes.append(inspector.get_pk_constraint(table)['constrained_columns'])
+        indexes += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table)]
+        foreign_keys = [fk['constrained_columns'] for fk in inspector.get_foreign_keys(table)]
+        tables[table] = (foreign_keys, indexes)
+    return _missing(tables)
+
+
+def register_commands(app):
+    @app.cli.command('check-fk-indexes')
+    @click.option('--database', is_flag=True, help="vérifie la base réelle au lieu des modèles")
+    def check_fk_indexes(database):
+        """Vérifie que chaque clé étrangère a un index"""
+        manquants = missing_fk_indexes_database() if database else missing_fk_indexes_models()
+        if not manquants:
+            click.echo("Toutes les clés étrangères ont un index")
+            return
+
+        for table, columns in manquants:
+            click.echo(f"Clé étrangère sans index : {table}({', '.join(columns)})", err=True)
+        sys.exit(1)
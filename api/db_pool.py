@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+"""
+Pool de connexions Postgres de l'api, réglé par variables d'environnement (SQLALCHEMY_ENGINE_OPTIONS)
+
+- DB_POOL_SIZE : connexions gardées ouvertes par processus (5)
+- DB_MAX_OVERFLOW : connexions en plus autorisées lors des pics, fermées ensuite (10)
+- DB_POOL_TIMEOUT : secondes d'attente max d'une connexion libre avant erreur (30)
+- DB_POOL_RECYCLE : une connexion plus vieille que ça est rouverte (1800 s)
+- DB_POOL_PRE_PING : vérifie la connexion avant de la donner (1)
+- DB_STATEMENT_TIMEOUT_MS : durée max d'une requête SQL, 0 pour aucune limite (0)
+- DB_PGBOUNCER : 1 derrière PgBouncer en mode transaction
+
+nb max de connexions = workers gunicorn x (DB_POOL_SIZE + DB_MAX_OVERFLOW), à garder sous max_connections
+
+En mode PgBouncer (transaction pooling) une connexion serveur change à chaque transaction :
+aucun état de session (SET, options de démarrage) ne doit être posé, le statement_timeout est donc
+appliqué avec SET LOCAL au début de chaque transaction au lieu de l'option de connexion
+"""
+
+
+def _env_int(name, default):
+    return int(os.getenv(name) or default)
+
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool qui mesure le temps passé à attendre une connexion (exporté par /api/metrics)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            attente = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_total += attente
+                self.wait_max = max(self.wait_max, attente)
+
+    def stats(self):
+        with self._metrics_lock:
+            return {
+                'size': self.size(),
+                'max_overflow': self._max_overflow,
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': max(self.overflow(), 0),
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+                'wait_max_ms': round(self.wait_max * 1000, 3)
+            }
+
+
+def pgbouncer_mode():
+    return os.getenv('DB_PGBOUNCER', '0') == '1'
+
+
+def engine_options():
+    """valeur de SQLALCHEMY_ENGINE_OPTIONS"""
+    options = {
+        'poolclass': MeteredQueuePool,
+        'pool_size': _env_int('DB_POOL_SIZE', 5),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1'
+    }
+
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    if statement_timeout and not pgbouncer_mode():
+        # option de session posée à l'ouverture de la connexion
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+
+def install_pool_events(engine):
+    """en mode PgBouncer : statement_timeout par transaction (SET LOCAL) au lieu de l'option de session"""
+    statement_timeout = _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+    if not (statement_timeout and pgbouncer_mode()):
+        return
+
+    @event.listens_for(engine, 'begin')
+    def set_statement_timeout(connection):
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {statement_timeout}')
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    if isinstance(pool, MeteredQueuePool):
+        return pool.stats()
+    return {'status': pool.status()}
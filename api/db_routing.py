@@ -0,0 +1,146 @@
+import os
+import time
+import hashlib
+import threading
+from flask import request, g, has_app_context
+from flask_sqlalchemy.session import Session
+
+"""
+Lecture sur réplicas Postgres (optionnel) : DB_REPLICA_URIS=postgresql://...@replica1/db,postgresql://...@replica2/db
+
+- les requêtes GET / HEAD / OPTIONS lisent sur un réplica choisi à tour de rôle, toutes les autres
+  (et toute écriture, flush) vont sur la base principale
+- chaque réplica est vérifié au plus toutes les DB_REPLICA_HEALTH_INTERVAL secondes (connexion + retard
+  de réplication <= DB_REPLICA_MAX_LAG secondes), un réplica en échec est ignoré, sans réplica sain
+  tout part sur la principale
+- lire ses propres écritures : après une écriture réussie le client est envoyé sur la principale pendant
+  DB_PRIMARY_PIN_SECONDS secondes. La réponse porte X-Primary-Until (timestamp) que l'ui renvoie ensuite,
+  l'api retient aussi la date par jeton d'authentification pour les clients qui ne renvoient pas l'en-tête
+
+chaque réponse servie par un réplica porte X-DB-Route: <réplica> (pratique pour tester avec deux Postgres locaux)
+"""
+
+REPLICA_URIS = [uri.strip() for uri in os.getenv('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+PRIMARY_PIN_SECONDS = int(os.getenv('DB_PRIMARY_PIN_SECONDS') or 5)
+HEALTH_INTERVAL = int(os.getenv('DB_REPLICA_HEALTH_INTERVAL') or 10)
+MAX_LAG = int(os.getenv('DB_REPLICA_MAX_LAG') or 10)
+
+SAFE_METHODS = ['GET', 'HEAD', 'OPTIONS']
+
+# retard de réplication en secondes, 0 si le réplica a rejoué tout ce qu'il a reçu (ou si ce n'est pas un réplica)
+LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def replica_binds():
+    """valeur de SQLALCHEMY_BINDS : un moteur par réplica (mêmes options de pool que la principale)"""
+    return {f'replica_{index}': uri for index, uri in enumerate(REPLICA_URIS)}
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next = 0
+        self._health = {}
+        # jeton -> date jusqu'à laquelle ce client lit sur la principale
+        self._pins = {}
+
+    def _is_healthy(self, key, engine):
+        now = time.monotonic()
+        checked_at, healthy = self._health.get(key, (None, False))
+        if checked_at is not None and now - checked_at < HEALTH_INTERVAL:
+            return healthy
+
+        try:
+            with engine.connect() as connection:
+                healthy = connection.exec_driver_sql(LAG_QUERY).scalar() <= MAX_LAG
+        except Exception:
+            healthy = False
+        self._health[key] = (now, healthy)
+        return healthy
+
+    def choose(self, engines):
+        """réplica sain suivant (tour de rôle) ou None"""
+        keys = sorted(engines)
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(keys)
+
+        for offset in range(len(keys)):
+            key = keys[(start + offset) % len(keys)]
+            if self._is_healthy(key, engines[key]):
+                return key
+        return None
+
+    def pin(self, client_key, until):
+        with self._lock:
+            self._pins[client_key] = until
+            # on oublie les dates passées pour que le dico ne grossisse pas
+            if len(self._pins) > 10000:
+                now = time.time()
+                self._pins = {key: value for key, value in self._pins.items() if value > now}
+
+    def is_pinned(self, client_key):
+        return self._pins.get(client_key, 0) > time.time()
+
+    def health(self):
+        return {key: healthy for key, (_, healthy) in self._health.items()}
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Session flask-sqlalchemy qui lit sur le réplica choisi pour la requête (g.db_replica)"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('db_replica')
+            if replica:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _client_key():
+    """identifie le client sans décoder le JWT (le hash du jeton suffit)"""
+    authorization = request.headers.get('Authorization', '')
+    return hashlib.sha1(authorization.encode()).hexdigest() if authorization else None
+
+
+def _pinned_to_primary():
+    try:
+        if float(request.headers.get('X-Primary-Until', 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    client_key = _client_key()
+    return client_key is not None and router.is_pinned(client_key)
+
+
+def init_replicas(app, db):
+    """à appeler après db.init_app, ne fait rien sans DB_REPLICA_URIS"""
+    if not REPLICA_URIS:
+        return
+
+    @app.before_request
+    def choose_replica():
+        if request.method not in SAFE_METHODS or _pinned_to_primary():
+            return
+        replicas = {key: engine for key, engine in db.engines.items() if key and key.startswith('replica_')}
+        g.db_replica = router.choose(replicas)
+
+    @app.after_request
+    def pin_after_write(response):
+        if g.get('db_replica'):
+            response.headers['X-DB-Route'] = g.db_replica
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            until = time.time() + PRIMARY_PIN_SECONDS
+            response.headers['X-Primary-Until'] = str(until)
+            client_key = _client_key()
+            if client_key:
+                router.pin(client_key, until)
+        return response
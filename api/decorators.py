@@ -1,8 +1,13 @@
+import os
 from functools import wraps
-from flask import request
+from flask import request, current_app
+from sqlalchemy import or_, select, true
+from sqlalchemy.orm import contains_eager
 from jwt_utils import get_current_user
 from models.libraries import Library
 from models.media import Media
+from cache import TTLCache, get_generations
+from etag import with_etag
 from error_handler import authentication_error, authorization_error, not_found_error, handle_api_error
 
 """
@@ -48,17 +53,16 @@ def require_trusted_or_admin(f):
     return decorated_function
 
 def require_owner_or_admin(f):
+    """
+    Charge la vidéothèque (library_id) ou le média et sa vidéothèque (media_id, une seule requête en jointure)
+    et les laisse dans request.library / request.media pour la route, qui ne les relit pas
+    """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         user = get_current_user()
         if not user:
             return handle_api_error(authentication_error())
         
-        if user.role == 'admin':
-            request.current_user = user
-            return f(*args, **kwargs)
-        
-        # On vérifie si il propriétaire de la biblio ou média
         library_id = kwargs.get('library_id')
         media_id = kwargs.get('media_id')
         
@@ -66,16 +70,25 @@ def require_owner_or_admin(f):
             library = Library.query.get(library_id)
             if not library:
                 return handle_api_error(not_found_error("library", library_id))
-            if library.owner_id != user.id:
+            # On vérifie si il propriétaire de la biblio (sauf admin)
+            if user.role != 'admin' and library.owner_id != user.id:
                 return handle_api_error(authorization_error("Vous n'êtes pas propriétaire de cette vidéothèque"))
+            request.library = library
         
         if media_id:
-            media = Media.query.get(media_id)
+            media = (
+                Media.query
+                .join(Media.library)
+                .options(contains_eager(Media.library))
+                .filter(Media.id == media_id)
+                .first()
+            )
             if not media:
                 return handle_api_error(not_found_error("media", media_id))
-            library = Library.query.get(media.library_id)
-            if not library or library.owner_id != user.id:
+            if user.role != 'admin' and media.library.owner_id != user.id:
                 return handle_api_error(authorization_error("Vous n'êtes pas propriétaire de ce média"))
+            request.media = media
+            request.library = media.library
         
         request.current_user = user
         return f(*args, **kwargs)
@@ -102,12 +115,22 @@ def can_view_media(user, media):
     if not user:
         return False
 
-    library = Library.query.get(media.library_id)
+    # relation (déjà chargée en jointure ou dans la session, sinon une requête)
+    library = media.library
     if not library:
         return False
 
+    return can_view_media_owner(user, media.visibility, library.owner_id)
+
+def can_view_media_owner(user, visibility, owner_id):
+    """Même règle que can_view_media quand on a déjà le propriétaire (ex : ligne SQL sans objet ORM)"""
+    if visibility == 'public':
+        return True
+    if not user:
+        return False
+
     # Pour les médias privés : propriétaire de la bibliothèque, trusted ou admin peuvent voir
-    return library.owner_id == user.id or user.role in ['trusted', 'admin']
+    return owner_id == user.id or user.role in ['trusted', 'admin']
 
 def can_view_library(user, library):
     if library.visibility == 'public':
@@ -118,3 +141,77 @@ def can_view_library(user, library):
     # Pour les bibliothèques privées : propriétaire, trusted ou admin peuvent voir
     return library.owner_id == user.id or user.role in ['trusted', 'admin']
 
+def media_visibility_filter(user):
+    """
+    Même règle que can_view_media mais sous forme de condition SQL
+    pour filtrer directement dans la requête (avant la pagination)
+    """
+    if user and user.role in ['trusted', 'admin']:
+        return true()
+    if not user:
+        return Media.visibility == 'public'
+
+    # Médias publics OU médias d'une vidéothèque de l'utilisateur
+    owned_libraries = select(Library.id).where(Library.owner_id == user.id)
+    return or_(Media.visibility == 'public', Media.library_id.in_(owned_libraries))
+
+def library_visibility_filter(user):
+    """Même règle que can_view_library mais sous forme de condition SQL"""
+    if user and user.role in ['trusted', 'admin']:
+        return true()
+    if not user:
+        return Library.visibility == 'public'
+
+    # Vidéothèques publiques OU celles de l'utilisateur
+    return or_(Library.visibility == 'public', Library.owner_id == user.id)
+
+# réponses des recherches les plus demandées, cf cache_search
+search_cache = TTLCache(
+    max_size=int(os.getenv('SEARCH_CACHE_SIZE', 1024)),
+    ttl=int(os.getenv('SEARCH_CACHE_TTL', 60))
+)
+
+
+def get_viewer_class(user):
+    """anonymous, user, trusted ou admin : ce que voit un visiteur ne dépend que de ça (et de son id pour user)"""
+    if not user:
+        return 'anonymous'
+    return user.role
+
+
+def cache_search(*tables):
+    """
+    Met en cache la réponse d'une recherche en GET
+    clé : chemin + paramètres normalisés + classe du visiteur + générations des tables lues
+    une écriture sur une de ces tables (bump_generation) rend les anciennes entrées inaccessibles
+
+    les trusted / admin voient tout donc partagent le cache, un user voit en plus ses vidéothèques
+    privées donc son id fait partie de la clé
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user = get_current_user()
+            viewer_class = get_viewer_class(user)
+            cache_key = (
+                request.path,
+                viewer_class,
+                user.id if viewer_class == 'user' else None,
+                tuple(sorted(request.args.items(multi=True))),
+                get_generations(*tables)
+            )
+
+            cached = search_cache.get(cache_key)
+            if cached is not None:
+                body, status, mimetype, etag = cached
+                # l'ETag est gardé avec le corps : pas besoin de le recalculer, 304 direct si le client l'a
+                response = current_app.response_class(body, status=status, mimetype=mimetype)
+                return with_etag(response, etag)
+
+            response = with_etag(f(*args, **kwargs))
+            if response.status_code == 200:
+                etag, _ = response.get_etag()
+                search_cache.set(cache_key, (response.get_data(), response.status_code, response.mimetype, etag))
+            return response
+        return decorated_function
+    return decorator
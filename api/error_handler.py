@@ -21,12 +21,14 @@ class APIError(Exception):
 
 ERROR_CODES = {
     'MISSING_FIELD': 'MISSING_FIELD',
+    'INVALID_PARAMETER': 'INVALID_PARAMETER',
     'AUTHENTICATION_ERROR': 'AUTHENTICATION_ERROR',
     'AUTHORIZATION_ERROR': 'AUTHORIZATION_ERROR',
     'RESOURCE_NOT_FOUND': 'RESOURCE_NOT_FOUND',
     'RESOURCE_ALREADY_EXISTS': 'RESOURCE_ALREADY_EXISTS',
     'RESOURCE_CONFLICT': 'RESOURCE_CONFLICT',
     'METHOD_NOT_ALLOWED': 'METHOD_NOT_ALLOWED',
+    'SERVICE_UNAVAILABLE': 'SERVICE_UNAVAILABLE',
     'INTERNAL_SERVER_ERROR': 'INTERNAL_SERVER_ERROR'
 }
 
@@ -53,6 +55,10 @@ def handle_api_error(error):
 
 def handle_exception(e):
     db.session.rollback()
+
+    # Erreur métier levée plus bas (ex : paramètre invalide), on garde son format et son code
+    if isinstance(e, APIError):
+        return handle_api_error(e)
     
     try:
         status = e.code
@@ -82,6 +88,15 @@ def missing_fields_error(fields):
         details=details
     )
 
+def invalid_parameter_error(param_name, message=None):
+    message = message or f"Le paramètre '{param_name}' est invalide"
+    return APIError(
+        code=ERROR_CODES['INVALID_PARAMETER'],
+        message=message,
+        status_code=400,
+        details=[{"field": param_name, "message": message}]
+    )
+
 def authentication_error(message="Authentification requise"):
     return APIError(
         code=ERROR_CODES['AUTHENTICATION_ERROR'],
@@ -135,3 +150,10 @@ def method_not_allowed_error(message, resource=None):
         status_code=405,
         resource=resource
     )
+
+def service_unavailable_error(message="Service momentanément indisponible"):
+    return APIError(
+        code=ERROR_CODES['SERVICE_UNAVAILABLE'],
+        message=message,
+        status_code=503
+    )
@@ -0,0 +1,65 @@
+import hashlib
+from flask import request, make_response, current_app
+from sqlalchemy import literal_column
+
+"""
+Requêtes GET conditionnelles : chaque réponse porte un ETag faible (W/"...") et si le client renvoie
+la même valeur dans If-None-Match, l'api répond 304 Not Modified sans corps
+
+- ressources simples (vidéothèque, personne, genre, franchise) : l'ETag vient de xmin, la version
+  de la ligne tenue par Postgres (change à chaque UPDATE), on répond 304 avant de sérialiser quoi que ce soit
+- médias et recherches : l'ETag est un hash du corps (le document média vient déjà tout fait de Postgres,
+  les recherches en cache gardent le hash avec le corps)
+
+Vary: Authorization car la réponse dépend de qui la demande (visibilité, emails pour les admin)
+
+Flask-Compress ajoute l'algorithme à l'ETag des réponses compressées (W/"abc:gzip") :
+le client renvoie donc cette valeur, elle est acceptée comme la version non compressée
+"""
+
+# suffixes ajoutés par Flask-Compress à l'ETag selon la compression
+_COMPRESSION_SUFFIXES = ['', ':gzip', ':br', ':deflate']
+
+
+def row_version(model):
+    """colonne xmin de la table du modèle, à ajouter à la requête : db.session.query(Library, row_version(Library))"""
+    return literal_column(f'{model.__tablename__}.xmin').label('version')
+
+
+def make_etag(*parts):
+    """valeur d'ETag à partir de parts (version de la ligne, classe du visiteur, ...) et des paramètres (fields, expand)"""
+    data = '|'.join(str(part) for part in parts) + '|' + request.query_string.decode()
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def _client_has(etag):
+    return any(request.if_none_match.contains_weak(etag + suffix) for suffix in _COMPRESSION_SUFFIXES)
+
+
+def not_modified(etag):
+    """réponse 304 si le client a déjà cette version (If-None-Match), sinon None"""
+    if not _client_has(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.vary.add('Authorization')
+    return response
+
+
+def with_etag(response, etag=None):
+    """
+    Ajoute l'ETag faible à une réponse 200 (hash du corps si etag est None et qu'il n'y en a pas déjà un)
+    et la transforme en 304 si le client a déjà cette version
+    """
+    response = make_response(response)
+    if request.method != 'GET' or response.status_code != 200:
+        return response
+
+    if etag:
+        response.set_etag(etag, weak=True)
+    elif 'ETag' not in response.headers:
+        response.add_etag(weak=True)
+    response.vary.add('Authorization')
+
+    etag, _ = response.get_etag()
+    return not_modified(etag) or response
@@ -0,0 +1,104 @@
+from flask import request
+from sqlalchemy.orm import joinedload
+from models.users import User
+from models.libraries import Library
+from models.media import Franchise
+from models.persons import MediaPerson
+from decorators import can_view_library
+from error_handler import invalid_parameter_error
+
+"""
+Paramètre ?expand= : intègre directement les relations dans la réponse
+pour que l'ui n'ait pas à refaire un appel par élément (/users/<id> pour chaque vidéothèque, ...)
+
+chaque relation demandée coûte une seule requête IN (...) pour toute la page, quel que soit le nb d'éléments
+les fonctions travaillent sur les dicos déjà sérialisés (to_dict / to_dict_summary) et les complètent
+
+Ex : /api/search/media?q=star&expand=owner,franchise
+     -> chaque média contient "owner": {"id", "username", ...} et "franchise": {"id", "name", ...}
+"""
+
+# relations possibles -> champ de l'élément nécessaire pour les résoudre
+EXPAND_MEDIA = {'owner': 'library_id', 'franchise': 'franchise_id', 'library': 'library_id', 'cast': 'id'}
+EXPAND_LIBRARIES = {'owner': 'owner_id'}
+
+
+def get_expand_params(allowed):
+    """
+    Lit le paramètre expand (liste séparée par des virgules)
+    Retourne l'ensemble des relations demandées, erreur 400 si une relation n'est pas dans allowed
+    """
+    expand = {relation.strip() for relation in request.args.get('expand', '').split(',') if relation.strip()}
+    inconnues = expand - set(allowed)
+    if inconnues:
+        raise invalid_parameter_error('expand', f"Relations possibles : {', '.join(allowed)}")
+    return expand
+
+
+def fields_with_expand(fields, expand, allowed):
+    """
+    Combine ?fields= et ?expand= : les champs nécessaires aux relations sont lus même s'ils ne sont pas demandés
+    Retourne (champs à lire, champs à renvoyer), (None, None) si fields n'est pas utilisé
+    """
+    if fields is None:
+        return None, None
+    return fields | {allowed[relation] for relation in expand}, fields | expand
+
+
+def _users_by_id(user_ids):
+    if not user_ids:
+        return {}
+    return {user.id: user.to_dict() for user in User.query.filter(User.id.in_(user_ids))}
+
+
+def expand_libraries(items, expand):
+    """items : liste de vidéothèques sérialisées, complétées sur place"""
+    if 'owner' in expand:
+        owners = _users_by_id({item['owner_id'] for item in items})
+        for item in items:
+            item['owner'] = owners.get(item['owner_id'])
+    return items
+
+
+def expand_media(items, expand, user):
+    """
+    items : liste de médias sérialisés, complétés sur place
+    user : utilisateur courant, une vidéothèque privée qu'il ne peut pas voir est remplacée par None
+    """
+    if not items or not expand:
+        return items
+
+    if 'library' in expand or 'owner' in expand:
+        library_ids = {item['library_id'] for item in items}
+        libraries = {library.id: library for library in Library.query.filter(Library.id.in_(library_ids))}
+
+        if 'library' in expand:
+            for item in items:
+                library = libraries.get(item['library_id'])
+                item['library'] = library.to_dict() if library and can_view_library(user, library) else None
+
+        if 'owner' in expand:
+            owners = _users_by_id({library.owner_id for library in libraries.values()})
+            for item in items:
+                library = libraries.get(item['library_id'])
+                item['owner'] = owners.get(library.owner_id) if library else None
+
+    if 'franchise' in expand:
+        franchise_ids = {item['franchise_id'] for item in items if item.get('franchise_id')}
+        franchises = {}
+        if franchise_ids:
+            franchises = {franchise.id: franchise.to_dict() for franchise in Franchise.query.filter(Franchise.id.in_(franchise_ids))}
+        for item in items:
+            item['franchise'] = franchises.get(item.get('franchise_id'))
+
+    if 'cast' in expand:
+        media_ids = [item['id'] for item in items]
+        #le joinedload évite une requête par personne pour person_name
+        cast = MediaPerson.query.options(joinedload(MediaPerson.person)).filter(MediaPerson.media_id.in_(media_ids)).all()
+        cast_by_media = {}
+        for media_person in cast:
+            cast_by_media.setdefault(media_person.media_id, []).append(media_person.to_dict())
+        for item in items:
+            item['cast'] = cast_by_media.get(item['id'], [])
+
+    return items
@@ -1,2 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+from flask_migrate import Migrate
+from db_routing import RoutingSession
+# RoutingSession : lectures des GET sur un réplica si DB_REPLICA_URIS est défini, cf db_routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+# migrations du schéma, cf migrations/README
+migrate = Migrate()
\ No newline at end of file
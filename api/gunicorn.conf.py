@@ -0,0 +1,51 @@
+import os
+import multiprocessing
+
+"""
+Configuration gunicorn de l'api : gunicorn -c gunicorn.conf.py "app:create_app()"
+
+- GUNICORN_WORKERS : nb de processus (par défaut 2 x nb de CPU + 1)
+- GUNICORN_THREADS : threads par processus, au-dessus de 1 les workers sont en gthread
+  (utile car les requêtes passent surtout leur temps à attendre Postgres)
+- GUNICORN_PRELOAD : charge l'application une fois dans le maître avant de créer les workers (1 par défaut)
+- GUNICORN_MAX_REQUESTS : un worker est recyclé après ce nb de requêtes (+ un décalage aléatoire
+  pour qu'ils ne redémarrent pas tous en même temps), 0 pour désactiver
+- GUNICORN_RELOAD : 1 pour recharger à chaque modification du code (développement)
+
+Rechargement sans coupure en production : kill -HUP <pid du maître> (docker kill -s HUP api)
+"""
+
+bind = f"0.0.0.0:{os.getenv('PORT_API', '5000')}"
+
+workers = int(os.getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.getenv('GUNICORN_THREADS') or 1)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+reload = os.getenv('GUNICORN_RELOAD', '0') == '1'
+# le rechargement du code ne fonctionne pas avec une application préchargée dans le maître
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1' and not reload
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER') or 100)
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """
+    Avec preload_app les connexions Postgres ouvertes dans le maître seraient partagées par tous les workers :
+    chaque worker repart avec un pool vide (close=False pour ne pas fermer celles du maître)
+    """
+    from extensions import db
+    app = getattr(server.app, 'callable', None)
+    if app is None:
+        return
+    with app.app_context():
+        # principale et réplicas éventuels
+        for engine in db.engines.values():
+            engine.dispose(close=False)
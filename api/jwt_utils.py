@@ -1,13 +1,32 @@
 import jwt
 import os
+from collections import namedtuple
 from datetime import datetime, timedelta
-from flask import request
+from flask import request, g
 from models.users import User
+from cache import TTLCache
+
+"""
+Utilisateur authentifié : seuls id, role et username servent aux autorisations, on les garde
+dans auth_user_cache (par processus, LRU + TTL court) au lieu de relire la table users à chaque requête,
+et get_current_user est mémorisé sur g pour les décorateurs et les routes qui l'appellent plusieurs fois
+
+update_user et delete_user appellent invalidate_user, les autres workers voient le changement
+(ex : rôle retiré) au plus tard après AUTH_USER_CACHE_TTL secondes
+"""
 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
 JWT_ALGORITHM = 'HS256' #bravo Mathis pour la sécu
 JWT_EXPIRATION_HOURS = 24
 
+# champs immuables pendant la requête (pas un objet ORM : pour la vue complète relire User, cf /me)
+AuthUser = namedtuple('AuthUser', ['id', 'role', 'username'])
+
+auth_user_cache = TTLCache(
+    max_size=int(os.getenv('AUTH_USER_CACHE_SIZE', 1024)),
+    ttl=int(os.getenv('AUTH_USER_CACHE_TTL', 30))
+)
+
 def generate_token(user):
     payload = {
         'user_id': user.id,
@@ -42,7 +61,25 @@ def _extract_bearer_token():
     return parts[1]
 
 
-def get_current_user():
+def load_auth_user(user_id):
+    """AuthUser depuis le cache ou la base, None si l'utilisateur n'existe plus"""
+    user = auth_user_cache.get(user_id)
+    if user is None:
+        row = User.query.with_entities(User.id, User.role, User.username).filter(User.id == user_id).first()
+        if not row:
+            return None
+        user = AuthUser(row.id, row.role, row.username)
+        auth_user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """à appeler après le commit d'une modification / suppression d'un utilisateur"""
+    auth_user_cache.delete(user_id)
+    g.pop('current_user', None)
+
+
+def _resolve_current_user():
     token = _extract_bearer_token()
     
     if not token:
@@ -56,4 +93,11 @@ def get_current_user():
     if not user_id:
         return None
     
-    return User.query.get(user_id)
\ No newline at end of file
+    return load_auth_user(user_id)
+
+
+def get_current_user():
+    """AuthUser du jeton de la requête ou None, calculé une seule fois par requête"""
+    if 'current_user' not in g:
+        g.current_user = _resolve_current_user()
+    return g.current_user
\ No newline at end of file
@@ -0,0 +1,81 @@
+import logging
+from logging.config import fileConfig
+
+from flask import current_app
+from alembic import context
+
+# configuration alembic (alembic.ini)
+config = context.config
+fileConfig(config.config_file_name)
+logger = logging.getLogger('alembic.env')
+
+
+def get_engine():
+    return current_app.extensions['migrate'].db.engine
+
+
+def get_engine_url():
+    return get_engine().url.render_as_string(hide_password=False).replace('%', '%%')
+
+
+# même base que l'application (SQLALCHEMY_DATABASE_URI)
+config.set_main_option('sqlalchemy.url', get_engine_url())
+target_db = current_app.extensions['migrate'].db
+
+
+def get_metadata():
+    return target_db.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Les index GIN de recherche (tsvector, trigrammes) sont créés en SQL et n'existent pas dans les modèles :
+    on ne propose pas de les supprimer lors d'un flask db migrate
+    """
+    if type_ == 'index' and reflected and compare_to is None:
+        return False
+    return True
+
+
+def run_migrations_offline():
+    """génère le SQL sans se connecter (flask db upgrade --sql)"""
+    url = config.get_main_option('sqlalchemy.url')
+    context.configure(
+        url=url, target_metadata=get_metadata(), include_object=include_object, literal_binds=True
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # pas de migration vide générée quand rien n'a changé dans les modèles
+    def process_revision_directives(context, revision, directives):
+        if getattr(config.cmd_opts, 'autogenerate', False):
+            script = directives[0]
+            if script.upgrade_ops.is_empty():
+                directives[:] = []
+                logger.info('Aucun changement détecté dans les modèles.')
+
+    conf_args = current_app.extensions['migrate'].configure_args
+    if conf_args.get('process_revision_directives') is None:
+        conf_args['process_revision_directives'] = process_revision_directives
+
+    connectable = get_engine()
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=get_metadata(),
+            include_object=include_object,
+            **conf_args
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,152 @@
+"""Schéma de départ, identique à data/init.sql (sans les données de test)
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+Toutes les instructions sont idempotentes (IF NOT EXISTS / OR REPLACE) :
+sur une base créée par l'init.sql actuel cette migration ne change rien et sert juste de point de départ
+
+Une base créée par un ancien init.sql (volume existant, avant la recherche plein texte) n'a pas
+la colonne media.search_vector : CREATE TABLE IF NOT EXISTS media ne l'ajoute pas, elle est donc ajoutée
+par ALTER TABLE avant la fonction, le trigger et l'index qui l'utilisent, puis calculée pour les médias existants
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def search_vector_expression(row):
+    """tsvector d'un média (titre en poids A, synopsis en poids B), même calcul que data/init.sql"""
+    return f"""
+            setweight(to_tsvector('french', immutable_unaccent(coalesce({row}.title, ''))), 'A') ||
+            setweight(to_tsvector('simple', immutable_unaccent(coalesce({row}.title, ''))), 'A') ||
+            setweight(to_tsvector('french', immutable_unaccent(coalesce({row}.synopsis, ''))), 'B')"""
+
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+        SELECT public.unaccent('public.unaccent', $1)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL PRIMARY KEY,
+        username VARCHAR(100),
+        email VARCHAR(255) NOT NULL UNIQUE,
+        password VARCHAR(255) NOT NULL,
+        bio VARCHAR(255),
+        role VARCHAR(20) NOT NULL DEFAULT 'user' CHECK (role IN ('user', 'trusted', 'admin')),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS libraries (
+        id SERIAL PRIMARY KEY,
+        owner_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        visibility VARCHAR(20) NOT NULL DEFAULT 'private' CHECK (visibility IN ('public', 'private')),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS franchises (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        description TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS franchises_name_trgm_idx ON franchises USING GIN (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS franchises_description_trgm_idx ON franchises USING GIN (description gin_trgm_ops)",
+    """
+    CREATE TABLE IF NOT EXISTS media (
+        id SERIAL PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        type VARCHAR(50) NOT NULL CHECK (type IN ('film', 'serie')),
+        release_year SMALLINT,
+        duration SMALLINT,
+        synopsis TEXT,
+        cover_image_url VARCHAR,
+        trailer_url VARCHAR,
+        library_id INT NOT NULL REFERENCES libraries(id) ON DELETE CASCADE,
+        franchise_id INT REFERENCES franchises(id) ON DELETE SET NULL,
+        franchise_order INT,
+        visibility VARCHAR(20) NOT NULL CHECK (visibility IN ('public', 'private')),
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        search_vector TSVECTOR
+    )
+    """,
+    # bases créées avant la recherche plein texte
+    "ALTER TABLE media ADD COLUMN IF NOT EXISTS search_vector TSVECTOR",
+    f"""
+    CREATE OR REPLACE FUNCTION media_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {search_vector_expression('NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # OR REPLACE pour les triggers : Postgres 14 minimum (l'image est en 15)
+    """
+    CREATE OR REPLACE TRIGGER media_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, synopsis ON media
+        FOR EACH ROW EXECUTE FUNCTION media_search_vector_update()
+    """,
+    # médias enregistrés avant le trigger (ne fait rien si tout est déjà calculé)
+    f"UPDATE media SET search_vector = {search_vector_expression('media')} WHERE search_vector IS NULL",
+    "CREATE INDEX IF NOT EXISTS media_search_vector_idx ON media USING GIN (search_vector)",
+    "CREATE INDEX IF NOT EXISTS media_title_trgm_idx ON media USING GIN (title gin_trgm_ops)",
+    """
+    CREATE TABLE IF NOT EXISTS persons (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        birthdate DATE
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS persons_name_trgm_idx ON persons USING GIN (name gin_trgm_ops)",
+    """
+    CREATE TABLE IF NOT EXISTS media_persons (
+        media_id INT NOT NULL REFERENCES media(id) ON DELETE CASCADE,
+        person_id INT NOT NULL REFERENCES persons(id) ON DELETE CASCADE,
+        role VARCHAR(50),
+        character_name VARCHAR(255),
+        PRIMARY KEY (media_id, person_id, role)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS genres (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(100) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS media_genres (
+        media_id INT NOT NULL REFERENCES media(id) ON DELETE CASCADE,
+        genre_id INT NOT NULL REFERENCES genres(id) ON DELETE CASCADE,
+        PRIMARY KEY (media_id, genre_id)
+    )
+    """,
+]
+
+
+def upgrade():
+    for statement in STATEMENTS:
+        op.execute(statement)
+
+
+def downgrade():
+    # supprime tout le schéma (et les données)
+    for table in ['media_genres', 'genres', 'media_persons', 'persons', 'media', 'franchises', 'libraries', 'users']:
+        op.execute(f"DROP TABLE IF EXISTS {table} CASCADE")
+    op.execute("DROP FUNCTION IF EXISTS media_search_vector_update()")
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
@@ -0,0 +1,46 @@
+"""Index sur les clés étrangères et sur (visibility, owner_id)
+
+Revision ID: 0002_foreign_key_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+Postgres n'indexe pas les clés étrangères tout seul : sans ces index les filtres
+library_id / franchise_id / genre_id / person_id / owner_id des recherches, les jointures
+de expand et les ON DELETE CASCADE parcourent toute la table
+
+- media(library_id) : médias d'une vidéothèque, visibilité (library_id IN vidéothèques de l'utilisateur)
+- media(franchise_id) : filtre franchise, facettes, ON DELETE SET NULL des franchises
+- media_genres(genre_id) : filtre genre, suppression d'un genre (la clé primaire commence par media_id)
+- media_persons(person_id) : filtre personne, filmographie, suppression d'une personne
+- libraries(owner_id) : vidéothèques d'un utilisateur, suppression d'un utilisateur
+- libraries(visibility, owner_id) : library_visibility_filter (publiques OU à l'utilisateur)
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_foreign_key_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('media_library_id_idx', 'media', ['library_id']),
+    ('media_franchise_id_idx', 'media', ['franchise_id']),
+    ('media_genres_genre_id_idx', 'media_genres', ['genre_id']),
+    ('media_persons_person_id_idx', 'media_persons', ['person_id']),
+    ('libraries_owner_id_idx', 'libraries', ['owner_id']),
+    ('libraries_visibility_owner_id_idx', 'libraries', ['visibility', 'owner_id']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
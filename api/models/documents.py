@@ -0,0 +1,97 @@
+from sqlalchemy import select, func, cast, Text, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from extensions import db
+from models.media import Media, Genre, MediaGenre
+from models.libraries import Library
+from models.users import User
+from models.persons import Person, MediaPerson
+
+"""
+Document complet d'un média construit directement par Postgres (json_build_object / json_agg)
+
+même contenu que Media.to_dict (owner, genres, casting avec le nom des personnes) mais en une seule
+requête, et Postgres renvoie le JSON déjà sous forme de texte : flask le renvoie tel quel,
+sans créer d'objets ORM ni repasser par jsonify
+
+utilisé par GET /api/media/<id> et GET /api/media?ids=1,2,3
+"""
+
+_EMPTY_ARRAY = literal_column("'[]'::json")
+
+
+def _genres_json():
+    """[{"id", "name"}] des genres du média de la requête englobante"""
+    genre = func.json_build_object('id', Genre.id, 'name', Genre.name)
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(genre, Genre.id)), _EMPTY_ARRAY))
+        .select_from(MediaGenre)
+        .join(Genre, Genre.id == MediaGenre.genre_id)
+        .where(MediaGenre.media_id == Media.id)
+        .scalar_subquery()
+    )
+
+
+def _cast_json():
+    """[{"person_id", "person_name", "role", "character_name"}] comme MediaPerson.to_dict"""
+    membre = func.json_build_object(
+        'person_id', MediaPerson.person_id,
+        'person_name', Person.name,
+        'role', MediaPerson.role,
+        'character_name', MediaPerson.character_name
+    )
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(membre, MediaPerson.person_id)), _EMPTY_ARRAY))
+        .select_from(MediaPerson)
+        .join(Person, Person.id == MediaPerson.person_id)
+        .where(MediaPerson.media_id == Media.id)
+        .scalar_subquery()
+    )
+
+
+# champs du document -> expression SQL (fonction pour ne construire les sous-requêtes que si demandées)
+MEDIA_DOCUMENT_FIELDS = {
+    'id': lambda: Media.id,
+    'title': lambda: Media.title,
+    'type': lambda: Media.type,
+    'release_year': lambda: Media.release_year,
+    'duration': lambda: cast(Media.duration, Text),
+    'synopsis': lambda: Media.synopsis,
+    'cover_image_url': lambda: Media.cover_image_url,
+    'trailer_url': lambda: Media.trailer_url,
+    'library_id': lambda: Media.library_id,
+    'franchise_id': lambda: Media.franchise_id,
+    'franchise_order': lambda: Media.franchise_order,
+    'owner_id': lambda: Library.owner_id,
+    'owner_name': lambda: User.username,
+    'visibility': lambda: Media.visibility,
+    'genres': _genres_json,
+    'persons': _cast_json,
+    'created_at': lambda: Media.created_at
+}
+
+
+def media_documents(media_ids, fields=None):
+    """
+    Retourne une ligne par média trouvé : (id, visibility, owner_id, document)
+    document est le JSON du média en texte, visibility et owner_id servent à vérifier les droits
+    fields : champs du document à construire (None : tous), ex : sans persons le casting n'est pas lu
+    """
+    document = func.json_build_object(*[
+        argument
+        for field, expression in MEDIA_DOCUMENT_FIELDS.items() if fields is None or field in fields
+        for argument in (field, expression())
+    ])
+
+    requete = (
+        select(
+            Media.id,
+            Media.visibility,
+            Library.owner_id,
+            cast(document, Text).label('document')
+        )
+        .select_from(Media)
+        .join(Library, Library.id == Media.library_id)
+        .join(User, User.id == Library.owner_id)
+        .where(Media.id.in_(media_ids))
+    )
+    return db.session.execute(requete).all()
@@ -2,6 +2,9 @@ from extensions import db
 from datetime import datetime
 from sqlalchemy import CheckConstraint
 
+# clés de to_dict, pour ?fields=
+LIBRARY_FIELDS = ['id', 'name', 'description', 'owner_id', 'visibility', 'created_at']
+
 class Library(db.Model):
     __tablename__ = 'libraries'
 
@@ -15,6 +18,9 @@ class Library(db.Model):
 
     __table_args__ = (
         CheckConstraint("visibility IN ('public', 'private')", name='check_library_visibility'),
+        # index créés par la migration 0002_foreign_key_indexes
+        db.Index('libraries_owner_id_idx', 'owner_id'),
+        db.Index('libraries_visibility_owner_id_idx', 'visibility', 'owner_id'),
     )
 
     #Si on supprime la vidéothèque, on supprime tous les médias enfants
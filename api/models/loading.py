@@ -0,0 +1,52 @@
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+from models.media import Media
+from models.libraries import Library
+from models.persons import MediaPerson
+
+"""
+Profils de chargement des relations de Media, à passer à .options() selon l'endpoint
+
+sans options chaque relation touchée par to_dict est un lazy load : library, library.owner, genres,
+cast puis person pour chaque membre du casting -> ~35 requêtes pour un média avec 30 acteurs
+avec le profil detail c'est 3 requêtes quel que soit le casting (média + library + owner en jointure,
+genres et cast en selectin, person en jointure dans le selectin du cast)
+
+- detail : tout ce que lit Media.to_dict
+- with_cast : uniquement le casting et les personnes (GET /media/<id>/persons)
+- summary : aucune relation, to_dict_summary ne lit que des colonnes
+  raiseload lève une erreur si une relation est touchée au lieu de faire une requête en silence
+
+les options sont construites à l'appel car les backrefs (Media.library, Media.cast, Library.owner)
+n'existent qu'une fois tous les modèles importés
+"""
+
+
+def _detail():
+    return [
+        joinedload(Media.library).joinedload(Library.owner),
+        selectinload(Media.genres),
+        selectinload(Media.cast).joinedload(MediaPerson.person)
+    ]
+
+
+def _with_cast():
+    return [
+        joinedload(Media.library),
+        selectinload(Media.cast).joinedload(MediaPerson.person)
+    ]
+
+
+def _summary():
+    return [raiseload('*')]
+
+
+MEDIA_PROFILES = {
+    'detail': _detail,
+    'with_cast': _with_cast,
+    'summary': _summary
+}
+
+
+def media_options(profile):
+    """Ex : Media.query.options(*media_options('detail'))"""
+    return MEDIA_PROFILES[profile]()
@@ -1,6 +1,8 @@
 from extensions import db
 from datetime import datetime
 from sqlalchemy import CheckConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 
 class Franchise(db.Model):
     __tablename__ = 'franchises'
@@ -13,10 +15,20 @@ class Franchise(db.Model):
 
     def to_dict(self):
         """créer une vue pour l'api avec beaucoup d'informations"""
+        return Franchise.summary_from_row(self)
+
+    @staticmethod
+    def summary_columns():
+        """colonnes lues par summary_from_row, pour les listes sans objets ORM (with_entities)"""
+        return [Franchise.id, Franchise.name, Franchise.description]
+
+    @staticmethod
+    def summary_from_row(row):
+        """row : ligne sqlalchemy (ou objet Franchise) avec les colonnes de summary_columns"""
         return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description
+            'id': row.id,
+            'name': row.name,
+            'description': row.description
         }
 
 ###########################################################################
@@ -31,9 +43,19 @@ class Genre(db.Model):
 
     def to_dict(self):
         """créer une vue pour l'api avec beaucoup d'informations"""
+        return Genre.summary_from_row(self)
+
+    @staticmethod
+    def summary_columns():
+        """colonnes lues par summary_from_row, pour les listes sans objets ORM (with_entities)"""
+        return [Genre.id, Genre.name]
+
+    @staticmethod
+    def summary_from_row(row):
+        """row : ligne sqlalchemy (ou objet Genre) avec les colonnes de summary_columns"""
         return {
-            'id': self.id,
-            'name': self.name
+            'id': row.id,
+            'name': row.name
         }
 
 ###########################################################################
@@ -61,10 +83,16 @@ class Media(db.Model):
     __table_args__ = (
         CheckConstraint(type.in_(['film', 'serie']), name='check_media_type'),
         CheckConstraint(visibility.in_(['public', 'private']), name='check_media_visibility'),
+        # index créés par la migration 0002_foreign_key_indexes
+        db.Index('media_library_id_idx', 'library_id'),
+        db.Index('media_franchise_id_idx', 'franchise_id'),
     )
     
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
+    # rempli par le trigger media_search_vector_trigger (cf init.sql), jamais chargé par défaut
+    search_vector = deferred(db.Column(TSVECTOR))
+
     genres = db.relationship('Genre', secondary='media_genres', backref='medias')
 
     def to_dict(self):
@@ -91,17 +119,34 @@ class Media(db.Model):
 
     def to_dict_summary(self):
         """créer une vue plus légère pour les listes/recherches"""
+        return Media.summary_from_row(self)
+
+    @staticmethod
+    def summary_columns():
+        """
+        colonnes lues par summary_from_row : les listes font query.with_entities(*Media.summary_columns())
+        et reçoivent des lignes (tuples nommés) au lieu d'objets Media suivis par la session
+        """
+        return [
+            Media.id, Media.title, Media.type, Media.duration, Media.release_year, Media.synopsis,
+            Media.cover_image_url, Media.library_id, Media.franchise_id, Media.visibility, Media.created_at
+        ]
+
+    @staticmethod
+    def summary_from_row(row):
+        """row : ligne sqlalchemy (ou objet Media) avec les colonnes de summary_columns"""
         return {
-            'id': self.id,
-            'title': self.title,
-            'type': self.type,
-            'duration': str(self.duration) if self.duration else None,
-            'release_year': self.release_year,
-            'synopsis': self.synopsis,
-            'cover_image_url': self.cover_image_url,
-            'library_id': self.library_id,
-            'visibility': self.visibility,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'id': row.id,
+            'title': row.title,
+            'type': row.type,
+            'duration': str(row.duration) if row.duration else None,
+            'release_year': row.release_year,
+            'synopsis': row.synopsis,
+            'cover_image_url': row.cover_image_url,
+            'library_id': row.library_id,
+            'franchise_id': row.franchise_id,
+            'visibility': row.visibility,
+            'created_at': row.created_at.isoformat() if row.created_at else None
         }
 
 ###########################################################################
@@ -114,4 +159,9 @@ class MediaGenre(db.Model):
     __tablename__ = 'media_genres'
     
     media_id = db.Column(db.Integer, db.ForeignKey('media.id', ondelete="CASCADE"), primary_key=True)
-    genre_id = db.Column(db.Integer, db.ForeignKey('genres.id', ondelete="CASCADE"), primary_key=True)
\ No newline at end of file
+    genre_id = db.Column(db.Integer, db.ForeignKey('genres.id', ondelete="CASCADE"), primary_key=True)
+
+    # la clé primaire (media_id, genre_id) ne sert pas aux recherches par genre
+    __table_args__ = (
+        db.Index('media_genres_genre_id_idx', 'genre_id'),
+    )
\ No newline at end of file
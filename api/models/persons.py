@@ -9,10 +9,20 @@ class Person(db.Model):
 
     def to_dict(self):
         """créer une vue pour l'api avec beaucoup d'informations"""
+        return Person.summary_from_row(self)
+
+    @staticmethod
+    def summary_columns():
+        """colonnes lues par summary_from_row, pour les listes sans objets ORM (with_entities)"""
+        return [Person.id, Person.name, Person.birthdate]
+
+    @staticmethod
+    def summary_from_row(row):
+        """row : ligne sqlalchemy (ou objet Person) avec les colonnes de summary_columns"""
         return {
-            'id': self.id,
-            'name': self.name,
-            'birthdate': self.birthdate.isoformat() if self.birthdate else None
+            'id': row.id,
+            'name': row.name,
+            'birthdate': row.birthdate.isoformat() if row.birthdate else None
         }
 
 ###########################################################################
@@ -27,6 +37,11 @@ class MediaPerson(db.Model):
     role = db.Column(db.String(50), primary_key=True) 
     
     character_name = db.Column(db.String(255))
+
+    # la clé primaire (media_id, person_id, role) ne sert pas aux recherches par personne
+    __table_args__ = (
+        db.Index('media_persons_person_id_idx', 'person_id'),
+    )
     
     media = db.relationship('Media', backref=db.backref('cast', cascade="all, delete-orphan"))
     person = db.relationship('Person', backref=db.backref('filmography', cascade="all, delete-orphan"))
@@ -0,0 +1,122 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from error_handler import service_unavailable_error
+
+"""
+Hachage Argon2 des mots de passe hors des threads qui servent les requêtes
+
+Argon2 est fait pour coûter du CPU et de la mémoire : calculé dans le worker gunicorn, une rafale de
+connexions occupe tous les threads et bloque le reste de l'api. Les calculs partent dans un pool de
+processus dédié (par worker gunicorn, créé au premier appel) :
+
+- PASSWORD_HASH_WORKERS : processus de hachage par worker gunicorn (2), 0 pour hacher dans le thread (dev)
+- PASSWORD_HASH_QUEUE : calculs en cours ou en attente max par worker gunicorn (4 x PASSWORD_HASH_WORKERS),
+  au-delà la requête reçoit tout de suite un 503 au lieu de s'empiler
+- PASSWORD_HASH_TIMEOUT : secondes d'attente max d'un résultat avant 503 (10)
+
+verify_password renvoie aussi le nouveau hash quand les paramètres Argon2 ont changé depuis
+l'enregistrement du mot de passe (check_needs_rehash), la connexion le sauvegarde
+"""
+
+HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS') or 2)
+HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE') or 4 * max(HASH_WORKERS, 1))
+HASH_TIMEOUT = int(os.getenv('PASSWORD_HASH_TIMEOUT') or 10)
+
+_hasher = PasswordHasher()
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(HASH_QUEUE)
+_stats_lock = threading.Lock()
+_stats = {'in_flight': 0, 'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0, 'timeouts': 0}
+
+
+# exécutées dans les processus du pool
+
+def _hash(password):
+    return _hasher.hash(password)
+
+
+def _verify(password_hash, password):
+    """(mot de passe correct, nouveau hash ou None)"""
+    try:
+        _hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False, None
+    if _hasher.check_needs_rehash(password_hash):
+        return True, _hasher.hash(password)
+    return True, None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # forkserver : pas de fork d'un worker qui a des threads et des connexions ouvertes
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS, mp_context=context)
+        return _executor
+
+
+def _count(name, value=1):
+    with _stats_lock:
+        _stats[name] += value
+
+
+def _release():
+    _count('in_flight', -1)
+    _slots.release()
+
+
+def _run(function, *args):
+    if HASH_WORKERS <= 0:
+        return function(*args)
+
+    if not _slots.acquire(blocking=False):
+        _count('rejected')
+        raise service_unavailable_error("Trop de connexions en cours, réessayez dans quelques secondes")
+    _count('in_flight')
+    try:
+        future = _get_executor().submit(function, *args)
+    except Exception:
+        _release()
+        raise
+    # la place est rendue quand le calcul se termine (même après un timeout) : la file reste bornée
+    future.add_done_callback(lambda _: _release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        _count('timeouts')
+        raise service_unavailable_error("Trop de connexions en cours, réessayez dans quelques secondes")
+
+
+def hash_password(password):
+    hashed = _run(_hash, password)
+    _count('hashed')
+    return hashed
+
+
+def verify_password(password_hash, password):
+    """
+    Retourne (ok, nouveau_hash) : nouveau_hash est à enregistrer à la place de l'ancien quand il n'est pas None
+    Lève une APIError 503 si le pool est saturé
+    """
+    ok, new_hash = _run(_verify, password_hash, password)
+    _count('verified')
+    if new_hash:
+        _count('rehashed')
+    return ok, new_hash
+
+
+def hashing_stats():
+    with _stats_lock:
+        return {
+            'workers': HASH_WORKERS,
+            'queue_max': HASH_QUEUE,
+            **_stats
+        }
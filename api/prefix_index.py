@@ -0,0 +1,128 @@
+import os
+import re
+import time
+import bisect
+import threading
+import unicodedata
+from extensions import db
+from models.persons import Person
+from models.media import Genre, Franchise
+
+"""
+Index de préfixes en mémoire pour l'autocomplétion (/api/search/suggest)
+
+chaque mot des noms (minuscules, sans accents) est rangé dans une liste triée de (mot, id)
+une recherche fait un bisect sur le préfixe puis lit les entrées qui suivent : pas de requête Postgres
+
+l'index est chargé au premier appel puis mis à jour par les routes qui créent / modifient / suppriment
+comme il est propre à chaque processus, il est rechargé entièrement toutes les SUGGEST_INDEX_TTL secondes
+pour récupérer les modifications faites par les autres workers
+"""
+
+SUGGEST_INDEX_TTL = int(os.getenv('SUGGEST_INDEX_TTL', 300))
+
+
+def normalize(text):
+    """minuscules et sans accents : "Éric" -> "eric" """
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def _words(text):
+    return re.findall(r'\w+', normalize(text))
+
+
+class PrefixIndex:
+    def __init__(self, loader):
+        # loader : fonction qui retourne tous les (id, nom) à indexer
+        self._loader = loader
+        self._keys = []
+        self._names = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _insert(self, item_id, name):
+        words = set(_words(name))
+        self._names[item_id] = (name, words)
+        for word in words:
+            bisect.insort(self._keys, (word, item_id))
+
+    def _delete(self, item_id):
+        entry = self._names.pop(item_id, None)
+        if not entry:
+            return
+        for word in entry[1]:
+            position = bisect.bisect_left(self._keys, (word, item_id))
+            if position < len(self._keys) and self._keys[position] == (word, item_id):
+                del self._keys[position]
+
+    def _ensure_loaded(self):
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < SUGGEST_INDEX_TTL:
+            return
+
+        rows = self._loader()
+        keys = []
+        names = {}
+        for item_id, name in rows:
+            words = set(_words(name))
+            names[item_id] = (name, words)
+            keys.extend((word, item_id) for word in words)
+        keys.sort()
+
+        self._keys = keys
+        self._names = names
+        self._loaded_at = time.monotonic()
+
+    def add(self, item_id, name):
+        """ajoute ou remplace un élément (après un create / update)"""
+        with self._lock:
+            # pas encore chargé : le chargement complet le prendra en compte
+            if self._loaded_at is None:
+                return
+            self._delete(item_id)
+            self._insert(item_id, name)
+
+    def remove(self, item_id):
+        """retire un élément (après un delete)"""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._delete(item_id)
+
+    def search(self, query, limit=10):
+        """
+        Retourne au plus limit éléments [{"id", "name"}] dont chaque mot de la recherche
+        est le début d'un mot du nom (ex : "harr fo" -> Harrison Ford)
+        """
+        query_words = _words(query)
+        if not query_words:
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+
+            first, others = query_words[0], query_words[1:]
+            results = []
+            seen = set()
+            position = bisect.bisect_left(self._keys, (first,))
+            while position < len(self._keys) and len(results) < limit:
+                word, item_id = self._keys[position]
+                if not word.startswith(first):
+                    break
+                position += 1
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+
+                name, words = self._names[item_id]
+                if all(any(w.startswith(other) for w in words) for other in others):
+                    results.append({'id': item_id, 'name': name})
+
+        return results
+
+
+suggest_indexes = {
+    'person': PrefixIndex(lambda: db.session.query(Person.id, Person.name).all()),
+    'genre': PrefixIndex(lambda: db.session.query(Genre.id, Genre.name).all()),
+    'franchise': PrefixIndex(lambda: db.session.query(Franchise.id, Franchise.name).all())
+}
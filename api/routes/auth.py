@@ -1,8 +1,9 @@
 from flask import Blueprint, jsonify, request
-from argon2 import PasswordHasher
 from extensions import db
+from cache import bump_generation
 from models.users import User
 from jwt_utils import generate_token
+from password_hashing import hash_password, verify_password
 from decorators import require_auth
 from error_handler import (
     missing_fields_error, already_exists_error, authentication_error,
@@ -23,18 +24,18 @@ def register():
         
         if User.query.filter_by(email=email).first():
             return handle_api_error(already_exists_error("utilisateur", "email", email))
-        argon2_hash = PasswordHasher()
 
         user = User(
             username=data.get('username'),
             email=email,
-            password=argon2_hash.hash(data['password']),
+            password=hash_password(data['password']),
             bio=data.get('bio'),
             role='user'  # Rôle par défaut
         )
         
         db.session.add(user)
         db.session.commit()
+        bump_generation('users')
         
         token = generate_token(user)
         
@@ -59,10 +60,18 @@ def login():
         email = data['email'].lower()
         user = User.query.filter_by(email=email).first()
         
-        argon2_hash = PasswordHasher()
-        if not user or not argon2_hash.verify(user.password, data['password']):
+        if not user:
             return handle_api_error(authentication_error("Email ou mot de passe incorrect"))
         
+        ok, new_hash = verify_password(user.password, data['password'])
+        if not ok:
+            return handle_api_error(authentication_error("Email ou mot de passe incorrect"))
+        
+        # paramètres Argon2 changés depuis l'enregistrement : on remplace le hash
+        if new_hash:
+            user.password = new_hash
+            db.session.commit()
+        
         token = generate_token(user)
         
         response = jsonify({
@@ -77,7 +86,8 @@ def login():
 @require_auth
 def get_current_user_info():
     try:
-        user = request.current_user
+        # request.current_user ne garde que id / role / username, on relit le profil complet
+        user = User.query.get_or_404(request.current_user.id)
         return jsonify(user.to_dict()), 200
     except Exception as e:
         return handle_exception(e)
\ No newline at end of file
@@ -1,7 +1,10 @@
 from flask import Blueprint, jsonify, request
 from extensions import db
+from cache import bump_generation
 from models.media import Franchise
+from prefix_index import suggest_indexes
 from decorators import require_trusted_or_admin
+from etag import row_version, make_etag, not_modified, with_etag
 from error_handler import missing_field_error, handle_api_error, handle_exception
 
 franchises_bp = Blueprint('franchises', __name__)
@@ -10,8 +13,9 @@ franchises_bp = Blueprint('franchises', __name__)
 @franchises_bp.route('/<int:franchise_id>', methods=['GET'])
 def get_franchise_by_id(franchise_id):
     try:
-        franchise = Franchise.query.get_or_404(franchise_id)
-        return jsonify(franchise.to_dict()), 200
+        franchise, version = db.session.query(Franchise, row_version(Franchise)).filter(Franchise.id == franchise_id).first_or_404()
+        etag = make_etag(version)
+        return not_modified(etag) or with_etag(jsonify(franchise.to_dict()), etag)
     except Exception as e:
         return handle_exception(e)
 
@@ -31,6 +35,8 @@ def create_franchise():
         
         db.session.add(franchise)
         db.session.commit()
+        bump_generation('franchises')
+        suggest_indexes['franchise'].add(franchise.id, franchise.name)
         
         response = jsonify({
             'id': franchise.id,
@@ -56,6 +62,8 @@ def update_franchise(franchise_id):
             franchise.description = data['description']
         
         db.session.commit()
+        bump_generation('franchises')
+        suggest_indexes['franchise'].add(franchise.id, franchise.name)
         
         return jsonify({
             'id': franchise.id,
@@ -72,6 +80,8 @@ def delete_franchise(franchise_id):
         franchise = Franchise.query.get_or_404(franchise_id)
         db.session.delete(franchise)
         db.session.commit()
+        bump_generation('franchises')
+        suggest_indexes['franchise'].remove(franchise_id)
         
         return jsonify({"message": "Franchise supprimée avec succès"}), 200
     except Exception as e:
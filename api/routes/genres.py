@@ -1,7 +1,10 @@
 from flask import Blueprint, jsonify, request
 from extensions import db
+from cache import bump_generation
 from models.media import Genre
+from prefix_index import suggest_indexes
 from decorators import require_trusted_or_admin
+from etag import row_version, make_etag, not_modified, with_etag
 from error_handler import (
     missing_field_error, already_exists_error, handle_api_error, handle_exception
 )
@@ -11,8 +14,9 @@ genres_bp = Blueprint('genres', __name__)
 @genres_bp.route('/<int:genre_id>', methods=['GET'])
 def get_genre_by_id(genre_id):
     try:
-        genre = Genre.query.get_or_404(genre_id)
-        return jsonify(genre.to_dict()), 200
+        genre, version = db.session.query(Genre, row_version(Genre)).filter(Genre.id == genre_id).first_or_404()
+        etag = make_etag(version)
+        return not_modified(etag) or with_etag(jsonify(genre.to_dict()), etag)
     except Exception as e:
         return handle_exception(e)
 
@@ -32,6 +36,8 @@ def create_genre():
         
         db.session.add(genre)
         db.session.commit()
+        bump_generation('genres')
+        suggest_indexes['genre'].add(genre.id, genre.name)
         
         response = jsonify({
             'id': genre.id,
@@ -58,6 +64,8 @@ def update_genre(genre_id):
             genre.name = data['name']
         
         db.session.commit()
+        bump_generation('genres')
+        suggest_indexes['genre'].add(genre.id, genre.name)
         
         return jsonify({
             'id': genre.id,
@@ -74,6 +82,8 @@ def delete_genre(genre_id):
         genre = Genre.query.get_or_404(genre_id)
         db.session.delete(genre)
         db.session.commit()
+        bump_generation('genres')
+        suggest_indexes['genre'].remove(genre_id)
         
         return jsonify({"message": "Genre supprimé avec succès"}), 200
     except Exception as e:
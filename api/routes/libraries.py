@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, request
 from extensions import db
-from models.libraries import Library
-from decorators import require_auth, require_owner_or_admin, can_view_library
+from cache import bump_generation
+from models.libraries import Library, LIBRARY_FIELDS
+from routes.utils import get_fields_params, select_fields
+from decorators import require_auth, require_owner_or_admin, can_view_library, get_viewer_class
+from etag import row_version, make_etag, not_modified, with_etag
 from jwt_utils import get_current_user
-from decorators import can_view_media
+from expand import EXPAND_LIBRARIES, get_expand_params, fields_with_expand, expand_libraries
+from decorators import media_visibility_filter
 from models.media import Media
 from error_handler import (
     missing_field_error, authorization_error, handle_api_error, handle_exception
@@ -22,25 +26,41 @@ def get_library_media(library_id):
         if not can_view_library(user, library):
             return handle_api_error(authorization_error("Accès refusé à cette vidéothèque"))
         
-        all_medias = Media.query.filter_by(library_id=library_id).all()
-        
-        # Filtrage selon les permissions
-        visible_medias = [media for media in all_medias if can_view_media(user, media)]
+        # Filtrage selon les permissions directement en SQL, colonnes seules (pas d'objets Media)
+        visible_medias = (
+            Media.query
+            .filter_by(library_id=library_id)
+            .filter(media_visibility_filter(user))
+            .with_entities(*Media.summary_columns())
+            .all()
+        )
         
-        return jsonify([media.to_dict_summary() for media in visible_medias]), 200
+        return jsonify([Media.summary_from_row(media) for media in visible_medias]), 200
     except Exception as e:
         return handle_exception(e)
 
 @libraries_bp.route('/<int:library_id>', methods=['GET'])
 def get_library_by_id(library_id):
     try:
-        library = Library.query.get_or_404(library_id)
+        # xmin (version de la ligne) sert d'ETag, cf etag.py
+        library, version = db.session.query(Library, row_version(Library)).filter(Library.id == library_id).first_or_404()
         user = get_current_user()
         
         if not can_view_library(user, library):
             return handle_api_error(authorization_error("Accès refusé à cette vidéothèque"))
         
-        return jsonify(library.to_dict()), 200
+        # ?expand=owner pour éviter à l'ui de rappeler /users/<owner_id>
+        expand = get_expand_params(EXPAND_LIBRARIES)
+        _, champs_renvoyes = fields_with_expand(get_fields_params(LIBRARY_FIELDS), expand, EXPAND_LIBRARIES)
+
+        # le propriétaire intégré peut changer sans que la vidéothèque change : ETag sur le corps dans ce cas
+        etag = None if expand else make_etag(version, get_viewer_class(user))
+        reponse_304 = not_modified(etag) if etag else None
+        if reponse_304:
+            return reponse_304
+
+        library_data = expand_libraries([library.to_dict()], expand)[0]
+        return with_etag(jsonify(select_fields(library_data, champs_renvoyes)), etag)
     except Exception as e:
         return handle_exception(e)
 
@@ -68,6 +88,7 @@ def create_library():
         
         db.session.add(library)
         db.session.commit()
+        bump_generation('libraries')
         
         response = jsonify({
             'id': library.id,
@@ -84,7 +105,8 @@ def create_library():
 @require_owner_or_admin
 def update_library(library_id):
     try:
-        library = Library.query.get_or_404(library_id)
+        # chargée par require_owner_or_admin
+        library = request.library
         user = request.current_user
         data = request.json
         
@@ -102,6 +124,7 @@ def update_library(library_id):
             library.visibility = data['visibility']
         
         db.session.commit()
+        bump_generation('libraries')
         
         return jsonify({
             'id': library.id,
@@ -115,9 +138,11 @@ def update_library(library_id):
 @require_owner_or_admin
 def delete_library(library_id):
     try:
-        library = Library.query.get_or_404(library_id)
+        # chargée par require_owner_or_admin
+        library = request.library
         db.session.delete(library)
         db.session.commit()
+        bump_generation('libraries', 'media')
         
         return jsonify({"message": "Vidéothèque supprimée avec succès"}), 200
     except Exception as e:
@@ -1,29 +1,83 @@
-from flask import Blueprint, jsonify, request
+import json
+from flask import Blueprint, jsonify, request, current_app
 from extensions import db
+from cache import bump_generation
 from models.media import Media, Genre
 from models.persons import Person, MediaPerson
 from models.libraries import Library
-from decorators import require_auth, require_owner_or_admin, can_view_media
+from models.loading import media_options
+from models.documents import media_documents, MEDIA_DOCUMENT_FIELDS
+from routes.utils import get_fields_params, select_fields
+from etag import with_etag
+from decorators import require_auth, require_owner_or_admin, can_view_media, can_view_media_owner
 from jwt_utils import get_current_user
+from expand import EXPAND_MEDIA, get_expand_params, fields_with_expand, expand_media
 from error_handler import (
     missing_fields_error, not_found_error, authorization_error,
-    conflict_error, handle_api_error, handle_exception, APIError, ERROR_CODES
+    conflict_error, invalid_parameter_error, handle_api_error, handle_exception, APIError, ERROR_CODES
 )
 from random import choice
 
 media_bp = Blueprint('media', __name__)
 
 
+# nb max d'ids pour GET /api/media?ids=
+MAX_BULK_IDS = 100
+
+
+@media_bp.route('', methods=['GET'])
+def get_media_bulk():
+    """
+    Plusieurs médias complets en une requête : /api/media?ids=3,1,2
+    les médias introuvables ou non visibles sont ignorés, l'ordre des ids est conservé
+
+    Réponse : {"data": [{...même contenu que GET /api/media/<id>...}]}
+    fields : comme pour GET /api/media/<id>
+    """
+    try:
+        fields = get_fields_params(MEDIA_DOCUMENT_FIELDS)
+        try:
+            media_ids = [int(media_id) for media_id in request.args.get('ids', '').split(',') if media_id.strip()]
+        except ValueError:
+            return handle_api_error(invalid_parameter_error('ids', "ids doit être une liste d'entiers séparés par des virgules"))
+        if not media_ids or len(media_ids) > MAX_BULK_IDS:
+            return handle_api_error(invalid_parameter_error('ids', f"Entre 1 et {MAX_BULK_IDS} ids"))
+
+        user = get_current_user()
+        documents = {
+            row.id: row.document for row in media_documents(set(media_ids), fields)
+            if can_view_media_owner(user, row.visibility, row.owner_id)
+        }
+
+        # les documents sont déjà du JSON : on assemble le texte sans les décoder
+        body = '{"data": [' + ','.join(documents[media_id] for media_id in dict.fromkeys(media_ids) if media_id in documents) + ']}'
+        return with_etag(current_app.response_class(body, status=200, mimetype='application/json'))
+    except Exception as e:
+        return handle_exception(e)
+
 @media_bp.route('/<int:media_id>', methods=['GET'])
 def get_media_by_id(media_id):
     try:
-        media = Media.query.get_or_404(media_id)
+        # ?expand=library,franchise pour éviter à l'ui de rappeler /libraries et /franchises
+        expand = get_expand_params(EXPAND_MEDIA)
+        # ?fields=id,title : seuls ces champs sont construits par Postgres
+        colonnes_lues, champs_renvoyes = fields_with_expand(get_fields_params(MEDIA_DOCUMENT_FIELDS), expand, EXPAND_MEDIA)
+
+        # document construit par Postgres en une requête (cf models/documents.py)
+        rows = media_documents([media_id], colonnes_lues)
+        if not rows:
+            return handle_api_error(not_found_error("media", media_id))
+        row = rows[0]
         user = get_current_user()
         
-        if not can_view_media(user, media):
+        if not can_view_media_owner(user, row.visibility, row.owner_id):
             return handle_api_error(authorization_error("Accès refusé à ce média"))
         
-        return jsonify(media.to_dict()), 200
+        if expand:
+            media_data = expand_media([json.loads(row.document)], expand, user)[0]
+            return with_etag(jsonify(select_fields(media_data, champs_renvoyes)))
+        # ETag sur le document : il change dès que le média, ses genres, son casting ou son propriétaire changent
+        return with_etag(current_app.response_class(row.document, status=200, mimetype='application/json'))
     except Exception as e:
         return handle_exception(e)
 
@@ -76,6 +130,7 @@ def create_media():
                     db.session.add(media_person)
         
         db.session.commit()
+        bump_generation('media')
         
         response = jsonify({
             'id': media.id,
@@ -92,7 +147,8 @@ def create_media():
 @require_owner_or_admin
 def update_media(media_id):
     try:
-        media = Media.query.get_or_404(media_id)
+        # chargé par require_owner_or_admin
+        media = request.media
         data = request.json
         
         # Validation des champs obligatoires si présents
@@ -258,6 +314,7 @@ def update_media(media_id):
                 db.session.add(media_person)
         
         db.session.commit()
+        bump_generation('media')
         
         return jsonify({
             'id': media.id,
@@ -275,9 +332,11 @@ def update_media(media_id):
 @require_owner_or_admin
 def delete_media(media_id):
     try:
-        media = Media.query.get_or_404(media_id)
+        # chargé par require_owner_or_admin
+        media = request.media
         db.session.delete(media)
         db.session.commit()
+        bump_generation('media')
         
         return jsonify({"message": "Média supprimé avec succès"}), 200
     except Exception as e:
@@ -288,7 +347,7 @@ def delete_media(media_id):
 def get_media_persons(media_id):
     """Récupère la liste des personnes associées à un média."""
     try:
-        media = Media.query.get_or_404(media_id)
+        media = Media.query.options(*media_options('with_cast')).get_or_404(media_id)
         user = get_current_user()
         
         if not can_view_media(user, media):
@@ -327,6 +386,7 @@ def add_media_person(media_id):
         
         db.session.add(media_person)
         db.session.commit()
+        bump_generation('media')
         
         response = jsonify({
             'person_id': media_person.person_id,
@@ -352,6 +412,7 @@ def remove_media_person(media_id, person_id, role):
         
         db.session.delete(media_person)
         db.session.commit()
+        bump_generation('media')
         
         return jsonify({"message": "Personne retirée avec succès"}), 200
     except Exception as e:
@@ -0,0 +1,40 @@
+import os
+from flask import Blueprint, jsonify
+from extensions import db
+from db_pool import pool_stats
+from db_routing import router
+from jwt_utils import auth_user_cache
+from password_hashing import hashing_stats
+from decorators import require_admin, search_cache
+from routes.search import facets_cache, stats_cache
+from error_handler import handle_exception
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+@require_admin
+def get_metrics():
+    """
+    Compteurs internes du processus qui répond (chaque worker a les siens, d'où le pid)
+
+    db_pool : connexions ouvertes / utilisées / en dépassement et temps d'attente d'une connexion
+    si timeouts augmente ou wait_max_ms est élevé, le pool est trop petit pour le nb de threads du worker
+    db_replicas : pool de chaque réplica et résultat de son dernier contrôle de santé
+    """
+    try:
+        return jsonify({
+            'pid': os.getpid(),
+            'db_pool': pool_stats(db.engine),
+            'db_replicas': {
+                key: {'healthy': router.health().get(key), 'pool': pool_stats(engine)}
+                for key, engine in db.engines.items() if key
+            },
+            'search_cache': search_cache.stats(),
+            'facets_cache': facets_cache.stats(),
+            'stats_cache': stats_cache.stats(),
+            'auth_user_cache': auth_user_cache.stats(),
+            'password_hashing': hashing_stats()
+        }), 200
+    except Exception as e:
+        return handle_exception(e)
@@ -1,17 +1,34 @@
 from flask import Blueprint, jsonify, request
 from extensions import db
+from cache import bump_generation
+from sqlalchemy.orm import joinedload
 from models.persons import Person, MediaPerson
+from models.media import Media
+from prefix_index import suggest_indexes
 from decorators import require_trusted_or_admin, can_view_media
 from jwt_utils import get_current_user
-from error_handler import missing_field_error, handle_api_error, handle_exception
+from routes.utils import get_fields_params, project_columns, select_fields
+from etag import row_version, make_etag, not_modified, with_etag
+from error_handler import missing_field_error, not_found_error, handle_api_error, handle_exception
 
 persons_bp = Blueprint('persons', __name__)
 
 @persons_bp.route('/<int:person_id>', methods=['GET'])
 def get_person_by_id(person_id):
     try:
-        person = Person.query.get_or_404(person_id)
-        return jsonify(person.to_dict()), 200
+        # ?fields=id,name : seules les colonnes demandées sont lues
+        fields = get_fields_params([column.key for column in Person.summary_columns()])
+        person = (
+            Person.query
+            .with_entities(*project_columns(Person.summary_columns(), fields), row_version(Person))
+            .filter(Person.id == person_id)
+            .first()
+        )
+        if not person:
+            return handle_api_error(not_found_error("person", person_id))
+
+        etag = make_etag(person.version)
+        return not_modified(etag) or with_etag(jsonify(select_fields(Person.summary_from_row(person), fields)), etag)
     except Exception as e:
         return handle_exception(e)
 
@@ -31,6 +48,7 @@ def create_person():
         
         db.session.add(person)
         db.session.commit()
+        suggest_indexes['person'].add(person.id, person.name)
         
         response = jsonify({
             'id': person.id,
@@ -56,6 +74,8 @@ def update_person(person_id):
             person.birthdate = data['birthdate'] if data['birthdate'] else None
         
         db.session.commit()
+        bump_generation('persons')
+        suggest_indexes['person'].add(person.id, person.name)
         
         return jsonify({
             'id': person.id,
@@ -72,6 +92,8 @@ def delete_person(person_id):
         person = Person.query.get_or_404(person_id)
         db.session.delete(person)
         db.session.commit()
+        bump_generation('persons', 'media')
+        suggest_indexes['person'].remove(person_id)
         
         return jsonify({"message": "Personne supprimée avec succès"}), 200
     except Exception as e:
@@ -86,7 +108,10 @@ def get_person_media(person_id):
         user = get_current_user()
         
         # Récupération des relations MediaPerson pour cette personne
-        media_persons = MediaPerson.query.filter_by(person_id=person_id).all()
+        # le média et sa vidéothèque sont chargés en jointure : ni mp.media ni can_view_media ne refont de requête
+        media_persons = MediaPerson.query.options(
+            joinedload(MediaPerson.media).joinedload(Media.library)
+        ).filter_by(person_id=person_id).all()
         
         # Filtrage selon les permissions et construction de la réponse
         result = []
@@ -1,43 +1,160 @@
+import os
 from flask import Blueprint, request, jsonify
-from sqlalchemy import or_, func
+from datetime import datetime
+from sqlalchemy import func, distinct, tuple_, union_all, select, literal, null, and_, or_
+
+from extensions import db
+from cache import TTLCache, get_generations
 
 from models.media import Media, Genre, MediaGenre, Franchise
 from models.persons import Person, MediaPerson
 from models.users import User
-from models.libraries import Library
-from decorators import can_view_media, can_view_library
+from models.libraries import Library, LIBRARY_FIELDS
+from decorators import media_visibility_filter, library_visibility_filter, cache_search
 from jwt_utils import get_current_user
-from routes.utils import get_pagination_params, paginated_response, FilteredPagination
-from error_handler import handle_exception
+from routes.utils import (
+    paginate_query, paginated_response, build_prefix_tsquery, get_fields_params, project_columns, relevance_key
+)
+from prefix_index import suggest_indexes
+from etag import with_etag
+from expand import (
+    EXPAND_MEDIA, EXPAND_LIBRARIES, get_expand_params, fields_with_expand, expand_media, expand_libraries
+)
+from error_handler import handle_exception, handle_api_error, invalid_parameter_error
 
 search_bp = Blueprint('search', __name__)
 
+FACETS_MEDIA = ['genre', 'type', 'franchise', 'release_decade']
+
+# une seule photo des statistiques (clé = générations des tables comptées)
+stats_cache = TTLCache(max_size=1, ttl=int(os.getenv('STATS_REFRESH_SECONDS', 60)))
+
+# les facettes des visiteurs anonymes sont identiques pour tous, on les garde quelques secondes
+facets_cache = TTLCache(
+    max_size=int(os.getenv('FACETS_CACHE_SIZE', 256)),
+    ttl=int(os.getenv('FACETS_CACHE_TTL', 30))
+)
+
+
+@search_bp.after_request
+def add_search_etag(response):
+    """ETag sur le corps de toutes les recherches (déjà posé par cache_search pour celles en cache)"""
+    return with_etag(response)
+
+
+def _media_text_filter(param_recherche, mode='fulltext'):
+    """
+    Condition de recherche texte sur les médias et expression de pertinence associée
+    - fulltext : tsvector maintenu par trigger (index GIN media_search_vector_idx)
+    - contains : ancienne recherche '%q%' sur le titre (servie par l'index trigramme media_title_trgm_idx)
+
+    Retourne (None, None) si le texte ne contient aucun mot
+    """
+    if mode == 'contains':
+        search_pattern = f'%{param_recherche}%'
+        return Media.title.ilike(search_pattern), func.similarity(Media.title, param_recherche)
+
+    tsquery = build_prefix_tsquery(param_recherche)
+    if tsquery is None:
+        return None, None
+    return Media.search_vector.op('@@')(tsquery), func.ts_rank_cd(Media.search_vector, tsquery)
+
+
+def _media_facets(liste_medias, facets):
+    """
+    Compte les médias filtrés par genre, type, franchise et décennie en une seule requête
+    (GROUP BY GROUPING SETS) sur la requête déjà filtrée par visibilité et critères de recherche
+
+    Ex : {"genre": [{"id": 1, "name": "Action", "count": 3}], "type": [{"value": "film", "count": 6}], ...}
+    """
+    # un média n'apparaît qu'une fois même si une jointure de filtre (personne) le duplique
+    medias = liste_medias.with_entities(Media.id, Media.type, Media.franchise_id, Media.release_year).distinct().subquery()
+
+    colonnes_facettes = {
+        'genre': (Genre.id.label('genre_id'), Genre.name.label('genre_name')),
+        'type': (medias.c.type.label('type'),),
+        'franchise': (Franchise.id.label('franchise_id'), Franchise.name.label('franchise_name')),
+        'release_decade': (((medias.c.release_year // 10) * 10).label('release_decade'),)
+    }
+    facettes = [facet for facet in FACETS_MEDIA if facet in facets]
+    if not facettes:
+        return {}
+
+    requete = db.session.query(
+        # grouping() vaut 0 pour les colonnes du groupe auquel appartient la ligne
+        *[func.grouping(colonnes_facettes[facet][0].element).label(f'grouping_{facet}') for facet in facettes],
+        *[colonne for facet in facettes for colonne in colonnes_facettes[facet]],
+        func.count(distinct(medias.c.id)).label('count')
+    ).select_from(medias)
+
+    if 'genre' in facettes:
+        requete = requete.outerjoin(MediaGenre, MediaGenre.media_id == medias.c.id).outerjoin(Genre, Genre.id == MediaGenre.genre_id)
+    if 'franchise' in facettes:
+        requete = requete.outerjoin(Franchise, Franchise.id == medias.c.franchise_id)
+
+    requete = requete.group_by(func.grouping_sets(
+        *[tuple_(*[colonne.element for colonne in colonnes_facettes[facet]]) for facet in facettes]
+    ))
+
+    resultat = {facet: [] for facet in facettes}
+    for row in requete.all():
+        facet = next(f for f in facettes if getattr(row, f'grouping_{f}') == 0)
+
+        # les médias sans genre / franchise / année ne forment pas de facette
+        if facet == 'genre' and row.genre_id is not None:
+            resultat['genre'].append({'id': row.genre_id, 'name': row.genre_name, 'count': row.count})
+        elif facet == 'type':
+            resultat['type'].append({'value': row.type, 'count': row.count})
+        elif facet == 'franchise' and row.franchise_id is not None:
+            resultat['franchise'].append({'id': row.franchise_id, 'name': row.franchise_name, 'count': row.count})
+        elif facet == 'release_decade' and row.release_decade is not None:
+            resultat['release_decade'].append({'value': row.release_decade, 'count': row.count})
+
+    for valeurs in resultat.values():
+        valeurs.sort(key=lambda valeur: valeur['count'], reverse=True)
+    return resultat
+
 
 @search_bp.route('/persons', methods=['GET'])
 def search_persons():
     """
     - q : texte de recherche par nom
+    - sort : id (par défaut), name, ou relevance pour trier par similarité avec q
     - page : numéro de la page
     - per_page : nb de resultat par page
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
+    - fields : champs à renvoyer parmi id,name,birthdate
     
-    Ex : /api/search/persons?q=Jean&page=1&per_page=10
+    Ex : /api/search/persons?q=Jean&sort=relevance&page=1&per_page=10
     """
     try:
         param_recherche = request.args.get('q', '')
-        page, per_page = get_pagination_params()
+        sort = request.args.get('sort')
+        fields = get_fields_params([column.key for column in Person.summary_columns()])
         liste_perssonne = Person.query
+
+        # tri : (expression, décroissant)
+        tris = {
+            'id': (Person.id, False),
+            'name': (Person.name, False)
+        }
         
         # filtrage selon le nom (ilike = insensitive like, cd: LIKE en SQL))
+        # l'index trigramme persons_name_trgm_idx permet à Postgres de servir le '%q%'
         if param_recherche:
             # Utilisation de paramètres pour éviter les injections SQL
             search_pattern = f'%{param_recherche}%'
             liste_perssonne = liste_perssonne.filter(Person.name.ilike(search_pattern))
+            tris['relevance'] = (relevance_key(func.similarity(Person.name, param_recherche)), True)
 
-        #.paginate hérité de l'objet query, retourne un objet de pagination
-        pagination = liste_perssonne.paginate(page=page, per_page=per_page, error_out=False)
+        # pagination par page ou par curseur sur (tri, id)
+        sort_key, descending = tris.get(sort, tris['id'])
+        # colonnes seules : pas d'objets Person à créer et suivre pour une liste en lecture seule
+        liste_perssonne = liste_perssonne.with_entities(*project_columns(Person.summary_columns(), fields))
+        pagination = paginate_query(liste_perssonne, sort_key, Person.id, descending)
 
         # appliquer la lambda fonction cad .to_dict à toutes les personnes
-        return paginated_response(pagination, lambda person: person.to_dict())
+        return paginated_response(pagination, Person.summary_from_row, fields=fields)
     except Exception as e:
         return handle_exception(e)
 
@@ -47,15 +164,17 @@ def search_users():
     """
     - q : texte de recherche : username ou email
     - role : filtre par rôle 
+    - sort : id (par défaut), username ou recent
     - page : numéro de la page
     - per_page : nb de resultat par page
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
     
     Exemple : /api/search/users?q=admin&role=admin&page=1
     """
     try:
         param_recherche = request.args.get('q', '')
         role = request.args.get('role')
-        page, per_page = get_pagination_params()
+        sort = request.args.get('sort')
 
         liste_users = User.query
         
@@ -69,7 +188,14 @@ def search_users():
             # Filtre par role (admin, trusted, user)
             liste_users = liste_users.filter_by(role=role)
 
-        pagination = liste_users.paginate(page=page, per_page=per_page, error_out=False)
+        tris = {
+            'id': (User.id, False),
+            # username peut être NULL, le curseur a besoin d'une valeur de tri non nulle
+            'username': (func.coalesce(User.username, ''), False),
+            'recent': (User.created_at, True)
+        }
+        sort_key, descending = tris.get(sort, tris['id'])
+        pagination = paginate_query(liste_users, sort_key, User.id, descending)
         
         current_user = get_current_user()
         is_admin = current_user is not None and current_user.role == "admin"
@@ -81,13 +207,15 @@ def search_users():
 
 
 @search_bp.route('/media', methods=['GET'])
+@cache_search('media', 'libraries', 'genres', 'franchises', 'users', 'persons')
 def search_media():
     """
+    La visibilité est filtrée directement en SQL avant la pagination,
+    le total vient donc du COUNT de la même requête
 
-    utilisation de FilteredPagination afin de convertir un objet de type liste
-    en objet de type pagination (pagination heritant de query obliger pour paginer)
-
-    - q : texte de recherche par titre
+    - q : texte de recherche (plein texte sur le titre et le synopsis)
+    - mode : fulltext (par défaut) ou contains pour l'ancienne recherche '%q%' sur le titre
+    - sort : id (par défaut), title, recent, ou relevance pour trier par pertinence avec q
     - library_id : filtre par vidéothèque
     - visibility : filtre par visibilité
     - franchise_id : filtre par franchise
@@ -95,28 +223,46 @@ def search_media():
     - person_id : filtre par acteur associée
     - page : numéro de la page
     - per_page : nb de resultat par page
-
-    Ex : /api/search/media?q=Star&genre_id=5&franchise_id=1&person_id=1&page=1&per_page=10
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
+    - facets : liste de facettes à compter parmi genre,type,franchise,release_decade
+    - expand : relations à intégrer parmi owner,franchise,library,cast
+    - fields : champs à renvoyer (ex : id,title,cover_image_url,release_year), les autres colonnes ne sont pas lues
+
+    Ex : /api/search/media?q=Star&sort=relevance&genre_id=5&franchise_id=1&person_id=1&page=1&per_page=10
+    Ex : /api/search/media?q=Star&facets=genre,type
+    Ex : /api/search/media?q=Star&expand=owner,franchise
     """
     try:
         
         user = get_current_user()
 
         param_recherche = request.args.get('q', '')
+        mode = request.args.get('mode', 'fulltext')
+        sort = request.args.get('sort')
         library_id = request.args.get('library_id', type=int)
         visibility = request.args.get('visibility')
         genre_id = request.args.get('genre_id', type=int)
         person_id = request.args.get('person_id', type=int)
         franchise_id = request.args.get('franchise_id', type=int)
-        
-        page, per_page = get_pagination_params()
-
-        liste_medias = Media.query
+        facets = [facet for facet in request.args.get('facets', '').split(',') if facet in FACETS_MEDIA]
+        expand = get_expand_params(EXPAND_MEDIA)
+        fields = get_fields_params([column.key for column in Media.summary_columns()])
+        colonnes_lues, champs_renvoyes = fields_with_expand(fields, expand, EXPAND_MEDIA)
+
+        tris = {
+            'id': (Media.id, False),
+            'title': (Media.title, False),
+            'recent': (Media.created_at, True)
+        }
+
+        # on ne garde que les médias que l'utilisateur a le droit de voir (les admin peuvent tout voir)
+        liste_medias = Media.query.filter(media_visibility_filter(user))
         
         if param_recherche:
-            # Recherche sécurisée avec paramètres
-            search_pattern = f'%{param_recherche}%'
-            liste_medias = liste_medias.filter(Media.title.ilike(search_pattern))
+            condition, pertinence = _media_text_filter(param_recherche, mode)
+            if condition is not None:
+                liste_medias = liste_medias.filter(condition)
+                tris['relevance'] = (relevance_key(pertinence), True)
         if library_id:
             liste_medias = liste_medias.filter_by(library_id=library_id)
         if visibility:
@@ -131,43 +277,52 @@ def search_media():
             # Jointure avec la table de liaison pour filtrer par franchise
             liste_medias = liste_medias.join(Franchise).filter(Franchise.id == franchise_id)
 
-        pagination = liste_medias.paginate(page=page, per_page=per_page, error_out=False)
-
-        # on vérifie que l'utilisateur a le droit de voir les média mais les admin peuvent tout voir
-        visible_medias = [media for media in pagination.items if can_view_media(user, media)]
-        
-        # Calculer le total réel de tous les médias visibles
-        # Pour les admins, tous les médias sont visibles donc on utilise pagination.total
-        # Sinon, on doit compter uniquement les médias publics ou ceux de l'utilisateur
-        if user and user.role == 'admin':
-            total_visible = pagination.total
-        else:
-            # Compter les médias visibles en parcourant tous les résultats de la requête
-            total_visible = sum(1 for media in liste_medias.all() if can_view_media(user, media))
-        
-        filtered_pagination = FilteredPagination(
-            items=visible_medias,
-            page=pagination.page,
-            per_page=pagination.per_page
+        extra = None
+        if facets:
+            # la clé ne dépend que des filtres (pas de la page ni du tri)
+            cache_key = (
+                tuple(sorted(
+                    (key, value) for key, value in request.args.items(multi=True)
+                    if key not in ['page', 'per_page', 'cursor', 'sort', 'expand', 'fields']
+                )),
+                get_generations('media', 'libraries', 'genres', 'franchises')
+            )
+            facettes = facets_cache.get(cache_key) if not user else None
+            if facettes is None:
+                facettes = _media_facets(liste_medias, facets)
+                if not user:
+                    facets_cache.set(cache_key, facettes)
+            extra = {'facets': facettes}
+
+        sort_key, descending = tris.get(sort, tris['id'])
+        # colonnes seules : pas d'objets Media à créer et suivre pour une liste en lecture seule
+        liste_medias = liste_medias.with_entities(*project_columns(Media.summary_columns(), colonnes_lues))
+        pagination = paginate_query(liste_medias, sort_key, Media.id, descending)
+
+        return paginated_response(
+            pagination, Media.summary_from_row, extra=extra,
+            expand_func=lambda items: expand_media(items, expand, user),
+            fields=champs_renvoyes
         )
-
-        return paginated_response(pagination=filtered_pagination, serializer_func=lambda media: media.to_dict_summary(), total_real=total_visible)
     except Exception as e:
         return handle_exception(e)
 
 
 @search_bp.route('/libraries', methods=['GET'])
+@cache_search('libraries', 'users')
 def search_libraries():
     """
-
-    utilisation de FilteredPagination afin de convertir un objet liste en objet pagination
-    heritant de query
+    La visibilité est filtrée en SQL avant la pagination, le total vient du COUNT de la même requête
 
     - q : texte de recherche par nom
     - owner_id : filtre par propriétaire 
     - visibility : filtre par visibilité
+    - sort : id (par défaut), name ou recent
     - page : numéro de la page
     - per_page : nb de resultat par page
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
+    - expand : owner pour intégrer le propriétaire
+    - fields : champs à renvoyer parmi id,name,description,owner_id,visibility,created_at
     
     Exemple : /api/search/libraries?q=Ma&visibility=public&page=1
     """
@@ -177,22 +332,14 @@ def search_libraries():
         param_recherche = request.args.get('q', '')
         owner_id = request.args.get('owner_id', type=int)
         visibility = request.args.get('visibility')
-        
-        page, per_page = get_pagination_params()
+        sort = request.args.get('sort')
+        expand = get_expand_params(EXPAND_LIBRARIES)
+        # les vidéothèques n'ont pas de grosse colonne : on lit tout et on ne filtre que le JSON
+        _, champs_renvoyes = fields_with_expand(get_fields_params(LIBRARY_FIELDS), expand, EXPAND_LIBRARIES)
 
-        liste_libraries = Library.query
-        
         # Filtrer pour n'inclure que les vidéothèques visibles par l'utilisateur AVANT la pagination
-        # Les admins et trusted peuvent tout voir, sinon on filtre : publiques OU propriété de l'utilisateur
-        if not (user and user.role in ['admin', 'trusted']):
-            if user:
-                # Inclure les vidéothèques publiques OU celles de l'utilisateur
-                liste_libraries = liste_libraries.filter(
-                    or_(Library.visibility == 'public', Library.owner_id == user.id)
-                )
-            else:
-                # Utilisateur non connecté : seulement les vidéothèques publiques
-                liste_libraries = liste_libraries.filter_by(visibility='public')
+        # Les admins et trusted peuvent tout voir, sinon : publiques OU propriété de l'utilisateur
+        liste_libraries = Library.query.filter(library_visibility_filter(user))
         
         if param_recherche:
             # Recherche par nom ou description (paramètres pour sécurité)
@@ -205,43 +352,38 @@ def search_libraries():
         if visibility:
             liste_libraries = liste_libraries.filter_by(visibility=visibility)
 
-        pagination = liste_libraries.paginate(page=page, per_page=per_page, error_out=False)
-
-        # On vérifie que l'utilisateur a le droit de voir les libraries (double vérification)
-        visible_libraries = [library for library in pagination.items if can_view_library(user, library)]
-        
-        # Calculer le total réel de toutes les vidéothèques visibles
-        # Pour les admins et trusted, toutes les vidéothèques sont visibles donc on utilise pagination.total
-        # Sinon, on doit compter uniquement les vidéothèques publiques ou celles de l'utilisateur
-        if user and user.role in ['admin', 'trusted']:
-            total_visible = pagination.total
-        else:
-            # Compter les vidéothèques visibles en parcourant tous les résultats de la requête
-            total_visible = sum(1 for library in liste_libraries.all() if can_view_library(user, library))
-        
-        filtered_pagination = FilteredPagination(
-            items=visible_libraries,
-            page=pagination.page,
-            per_page=pagination.per_page
+        tris = {
+            'id': (Library.id, False),
+            'name': (Library.name, False),
+            'recent': (Library.created_at, True)
+        }
+        sort_key, descending = tris.get(sort, tris['id'])
+        pagination = paginate_query(liste_libraries, sort_key, Library.id, descending)
+
+        return paginated_response(
+            pagination, lambda library: library.to_dict(),
+            expand_func=lambda items: expand_libraries(items, expand),
+            fields=champs_renvoyes
         )
-
-        return paginated_response(pagination=filtered_pagination, serializer_func=lambda library: library.to_dict(), total_real=total_visible)
     except Exception as e:
         return handle_exception(e)
 
 
 @search_bp.route('/genres', methods=['GET'])
+@cache_search('genres')
 def search_genres():
     """    
     - q : texte de recherche par nom
+    - sort : id (par défaut) ou name
     - page : numéro de la page
     - per_page : nb de resultat par page
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
     
     Exemple : /api/search/genres?q=Action&page=1
     """
     try:
         param_recherche = request.args.get('q', '')
-        page, per_page = get_pagination_params()
+        sort = request.args.get('sort')
 
         liste_genres = Genre.query
         
@@ -250,9 +392,15 @@ def search_genres():
             search_pattern = f'%{param_recherche}%'
             liste_genres = liste_genres.filter(Genre.name.ilike(search_pattern))
 
-        pagination = liste_genres.paginate(page=page, per_page=per_page, error_out=False)
+        tris = {
+            'id': (Genre.id, False),
+            'name': (Genre.name, False)
+        }
+        sort_key, descending = tris.get(sort, tris['id'])
+        liste_genres = liste_genres.with_entities(*Genre.summary_columns())
+        pagination = paginate_query(liste_genres, sort_key, Genre.id, descending)
 
-        return paginated_response(pagination, lambda genre: genre.to_dict())
+        return paginated_response(pagination, Genre.summary_from_row)
     except Exception as e:
         return handle_exception(e)
 
@@ -261,43 +409,191 @@ def search_genres():
 def search_franchises():
     """
     - q : texte de recherche par nom
+    - sort : id (par défaut), name, ou relevance pour trier par similarité du nom avec q
     - page : numéro de la page
     - per_page : nb de resultat par page
+    - cursor : pagination par curseur (vide pour la première page puis next_cursor)
     
-    Exemple : /api/search/franchises?q=Star&page=1
+    Exemple : /api/search/franchises?q=Star&sort=relevance&page=1
     """
     try:
         param_recherche = request.args.get('q', '')
-        page, per_page = get_pagination_params()
+        sort = request.args.get('sort')
         liste_franchises = Franchise.query
+
+        tris = {
+            'id': (Franchise.id, False),
+            'name': (Franchise.name, False)
+        }
         
         if param_recherche:
-            # Recherche par nom ou description (paramètres pour sécurité)
+            # Recherche par nom ou description (paramètres pour sécurité, index trigrammes sur les deux colonnes)
             search_pattern = f'%{param_recherche}%'
             liste_franchises = liste_franchises.filter(
                 (Franchise.name.ilike(search_pattern)) | (Franchise.description.ilike(search_pattern))
             )
+            tris['relevance'] = (relevance_key(func.similarity(Franchise.name, param_recherche)), True)
 
-        pagination = liste_franchises.paginate(page=page, per_page=per_page, error_out=False)
+        sort_key, descending = tris.get(sort, tris['id'])
+        liste_franchises = liste_franchises.with_entities(*Franchise.summary_columns())
+        pagination = paginate_query(liste_franchises, sort_key, Franchise.id, descending)
         
-        return paginated_response(pagination, lambda franchise: franchise.to_dict())
+        return paginated_response(pagination, Franchise.summary_from_row)
+    except Exception as e:
+        return handle_exception(e)
+
+
+@search_bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Autocomplétion servie par l'index de préfixes en mémoire (prefix_index.py), sans requête SQL
+
+    - type : person, genre ou franchise
+    - q : début du nom (chaque mot est un préfixe, accents et majuscules ignorés)
+    - limit : nb max de suggestions (10 par défaut, 50 max)
+
+    Exemple : /api/search/suggest?type=person&q=harr
+    """
+    try:
+        suggest_type = request.args.get('type', 'person')
+        param_recherche = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+
+        if suggest_type not in suggest_indexes:
+            return handle_api_error(invalid_parameter_error('type', "Le type doit être person, genre ou franchise"))
+        if limit < 1 or limit > 50:
+            limit = 10
+
+        return jsonify({'data': suggest_indexes[suggest_type].search(param_recherche, limit)}), 200
+    except Exception as e:
+        return handle_exception(e)
+
+
+@search_bp.route('/all', methods=['GET'])
+def search_all():
+    """
+    Recherche globale : médias, personnes, vidéothèques et franchises en un seul appel
+    une seule requête SQL (UNION ALL) qui renvoie les limit meilleurs résultats de chaque type
+    avec le nombre total de résultats (count(*) over ())
+
+    - q : texte de recherche
+    - limit : nb de résultats par type (5 par défaut, 20 max)
+
+    Exemple : /api/search/all?q=star&limit=5
+    Réponse : {"media": {"total": 3, "data": [{"id": 1, "title": "...", "cover_image_url": "..."}]},
+               "persons": {"total": 0, "data": []}, "libraries": {...}, "franchises": {...}}
+    """
+    try:
+        user = get_current_user()
+        param_recherche = request.args.get('q', '').strip()
+        limit = request.args.get('limit', 5, type=int)
+        if limit < 1 or limit > 20:
+            limit = 5
+
+        resultat = {kind: {'total': 0, 'data': []} for kind in ['media', 'persons', 'libraries', 'franchises']}
+        if not param_recherche:
+            return jsonify(resultat), 200
+
+        search_pattern = f'%{param_recherche}%'
+
+        def top(kind, id_column, label_column, image_column, condition, pertinence):
+            # meilleurs résultats d'un type, le total est calculé avant le LIMIT par la fonction fenêtre
+            return select(
+                literal(kind).label('kind'),
+                id_column.label('id'),
+                label_column.label('label'),
+                image_column.label('image'),
+                func.count().over().label('total')
+            ).where(condition).order_by(pertinence.desc(), id_column).limit(limit).subquery()
+
+        sous_requetes = []
+
+        condition_media, pertinence_media = _media_text_filter(param_recherche)
+        if condition_media is not None:
+            sous_requetes.append(top(
+                'media', Media.id, Media.title, Media.cover_image_url,
+                and_(media_visibility_filter(user), condition_media), pertinence_media
+            ))
+        sous_requetes.append(top(
+            'persons', Person.id, Person.name, null(),
+            Person.name.ilike(search_pattern), func.similarity(Person.name, param_recherche)
+        ))
+        sous_requetes.append(top(
+            'libraries', Library.id, Library.name, null(),
+            and_(library_visibility_filter(user), or_(Library.name.ilike(search_pattern), Library.description.ilike(search_pattern))),
+            func.similarity(Library.name, param_recherche)
+        ))
+        sous_requetes.append(top(
+            'franchises', Franchise.id, Franchise.name, null(),
+            or_(Franchise.name.ilike(search_pattern), Franchise.description.ilike(search_pattern)),
+            func.similarity(Franchise.name, param_recherche)
+        ))
+
+        requete = union_all(*[select(sous_requete) for sous_requete in sous_requetes])
+        for row in db.session.execute(requete):
+            resultat[row.kind]['total'] = row.total
+            if row.kind == 'media':
+                resultat['media']['data'].append({'id': row.id, 'title': row.label, 'cover_image_url': row.image})
+            else:
+                resultat[row.kind]['data'].append({'id': row.id, 'name': row.label})
+
+        return jsonify(resultat), 200
     except Exception as e:
         return handle_exception(e)
 
 
+def _compute_stats():
+    """
+    Photo des statistiques du site en une seule requête (UNION ALL de 3 GROUP BY)
+    """
+    requete = union_all(
+        select(literal('media').label('kind'), Media.type.label('key'), Media.visibility.label('visibility'), func.count().label('count'))
+            .group_by(Media.type, Media.visibility),
+        select(literal('libraries'), null(), Library.visibility, func.count())
+            .group_by(Library.visibility),
+        select(literal('users'), User.role, null(), func.count())
+            .group_by(User.role)
+    )
+
+    stats = {
+        'media': 0,
+        'libraries': 0,
+        'users': 0,
+        'media_by_type': {},
+        'media_by_visibility': {},
+        'libraries_by_visibility': {},
+        'users_by_role': {}
+    }
+    for kind, key, visibility, count in db.session.execute(requete):
+        stats[kind] += count
+        if kind == 'media':
+            stats['media_by_type'][key] = stats['media_by_type'].get(key, 0) + count
+            stats['media_by_visibility'][visibility] = stats['media_by_visibility'].get(visibility, 0) + count
+        elif kind == 'libraries':
+            stats['libraries_by_visibility'][visibility] = count
+        else:
+            stats['users_by_role'][key] = count
+
+    stats['generated_at'] = datetime.utcnow().isoformat()
+    return stats
+
+
 @search_bp.route('/stats', methods=['GET'])
 def get_stats():
     """
-    Retourne les statistiques nb médias et vidéothèques dont privés
+    Retourne les statistiques nb médias, vidéothèques et utilisateurs dont privés, par type et par rôle
+
+    Les COUNT ne sont pas refaits à chaque affichage de l'accueil : la photo est gardée
+    STATS_REFRESH_SECONDS secondes et recalculée plus tôt si une écriture a eu lieu dans ce processus
     """
     try:
-        total_media = Media.query.count()
-        total_libraries = Library.query.count()
-        
-        return jsonify({
-            'media': total_media,
-            'libraries': total_libraries
-        }), 200
+        cache_key = get_generations('media', 'libraries', 'users')
+        stats = stats_cache.get(cache_key)
+        if stats is None:
+            stats = _compute_stats()
+            stats_cache.set(cache_key, stats)
+
+        return jsonify(stats), 200
     except Exception as e:
         return handle_exception(e)
 
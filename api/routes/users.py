@@ -1,10 +1,11 @@
 from flask import Blueprint, jsonify, request
-from argon2 import PasswordHasher
 from extensions import db
+from cache import bump_generation
 from models.users import User
 from decorators import require_admin, require_self_or_admin, can_view_library
 from models.libraries import Library
-from jwt_utils import get_current_user
+from jwt_utils import get_current_user, invalidate_user
+from password_hashing import hash_password
 from error_handler import (
     missing_fields_error, already_exists_error, authorization_error,
     handle_api_error, handle_exception
@@ -37,17 +38,17 @@ def create_user():
         if User.query.filter_by(email=email).first():
             return handle_api_error(already_exists_error("utilisateur", "email", email))
         
-        argon2_hash = PasswordHasher()
         user = User(
             username=data.get('username'),
             email=email,
-            password=argon2_hash.hash(data['password']),
+            password=hash_password(data['password']),
             bio=data.get('bio'),
             role=data.get('role', 'user')  # Admin peut définir le rôle
         )
         
         db.session.add(user)
         db.session.commit()
+        bump_generation('users')
         
         response = jsonify({
             'id': user.id,
@@ -78,8 +79,7 @@ def update_user(user_id):
                 return handle_api_error(already_exists_error("utilisateur", "email", email))
             user.email = email
         if 'password' in data and data['password']:
-            argon2_hash = PasswordHasher()
-            user.password = argon2_hash.hash(data['password'])
+            user.password = hash_password(data['password'])
         if 'bio' in data:
             user.bio = data['bio']
         if 'role' in data:
@@ -89,6 +89,8 @@ def update_user(user_id):
                 return handle_api_error(authorization_error("Seul un admin peut modifier le rôle"))
         
         db.session.commit()
+        bump_generation('users')
+        invalidate_user(user_id)
         
         return jsonify({
             'id': user.id,
@@ -110,6 +112,8 @@ def delete_user(user_id):
         user = User.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        bump_generation('users', 'libraries', 'media')
+        invalidate_user(user_id)
         
         return jsonify({"message": "Utilisateur supprimé avec succès"}), 200
     except Exception as e:
@@ -1,4 +1,10 @@
+import re
+import json
+import base64
 from flask import jsonify, request
+from sqlalchemy import func, tuple_, null, cast
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from error_handler import invalid_parameter_error
 
 
 def get_pagination_params():
@@ -20,26 +26,168 @@ def get_pagination_params():
     return page, per_page
 
 
-class FilteredPagination:
+def get_fields_params(allowed):
     """
-    utilisé pour faire le pont entre la liste python et la pagination sqlalchemy
+    Lit le paramètre fields (?fields=id,title,cover_image_url) pour ne renvoyer que certains champs
+    Retourne None si absent (tous les champs), sinon l'ensemble des champs demandés + id
+    lève une APIError 400 si un champ n'est pas dans allowed
+    """
+    param_fields = request.args.get('fields')
+    if not param_fields:
+        return None
+
+    fields = {field.strip() for field in param_fields.split(',') if field.strip()}
+    if fields - set(allowed):
+        raise invalid_parameter_error('fields', f"Champs possibles : {', '.join(allowed)}")
+    return fields | {'id'}
+
+
+def project_columns(columns, fields):
+    """
+    Remplace par NULL les colonnes qui ne font pas partie de fields : Postgres ne les lit pas
+    (ex : synopsis pour une grille de vignettes) et les lignes gardent les mêmes noms pour summary_from_row
+    """
+    if fields is None:
+        return columns
+    return [column if column.key in fields else null().label(column.key) for column in columns]
+
+
+def select_fields(data, fields):
+    """Ne garde que les clés demandées d'un dico sérialisé (fields None : tout)"""
+    if fields is None:
+        return data
+    return {key: value for key, value in data.items() if key in fields}
 
-    paginated_response attend un objet de type pagination (hérité de l'objet query) qui nécéssite :
-        items, page, per_page
-    donc vus qu'on a une liste python de base on ajoute les param nécéssaire
 
+def build_prefix_tsquery(param_recherche):
+    """
+    Construit la tsquery de recherche plein texte à partir du texte saisi
+    chaque mot est cherché en préfixe (ex : "sorc pot" -> sorc:* & pot:*) pour la saisie au fil de l'eau
+    on combine les configs french (racines) et simple (noms propres), sans accents comme le tsvector
+
+    Retourne None si le texte ne contient aucun mot
+    """
+    # on ne garde que les mots pour ne jamais injecter la syntaxe tsquery (&, |, !, ...)
+    mots = re.findall(r'\w+', param_recherche)
+    if not mots:
+        return None
+
+    query_text = func.immutable_unaccent(' & '.join(f'{mot}:*' for mot in mots))
+    return func.to_tsquery('french', query_text).op('||')(func.to_tsquery('simple', query_text))
+
+
+def encode_cursor(sort_value, item_id):
+    """
+    Curseur opaque pour la pagination par curseur : (valeur de tri, id) du dernier élément renvoyé
+    les dates sont converties en texte, Postgres sait les relire telles quelles
     """
-    def __init__(self, items, page, per_page):
+    payload = json.dumps([sort_value, item_id], default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Inverse de encode_cursor, lève une APIError 400 si le curseur est illisible
+    """
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        return sort_value, int(item_id)
+    except (ValueError, TypeError):
+        raise invalid_parameter_error('cursor', "Le curseur de pagination est invalide")
+
+
+def relevance_key(expression):
+    """
+    Clé de tri sur un score de pertinence (ts_rank_cd, similarity) utilisable avec un curseur
+    ces fonctions renvoient un real : relu depuis le JSON du curseur le score ne vaut plus exactement
+    celui de la ligne et la page suivante répète ou saute des éléments, en double precision il est identique
+    """
+    return expression
+
+
+class KeysetPagination:
+    """
+    Pagination par curseur (keyset) : pas d'OFFSET ni de COUNT, on reprend juste après le dernier élément vu
+    expose les mêmes attributs que la pagination sqlalchemy utilisés par paginated_response
+    (items, page, per_page, total) avec page et total à None
+    """
+    def __init__(self, items, per_page, cursor, next_cursor):
         self.items = items
-        self.page = page
+        self.page = None
         self.per_page = per_page
+        self.total = None
+        self.cursor = cursor
+        self.next_cursor = next_cursor
 
 
-def paginated_response(pagination, serializer_func, total_real=None):
+def paginate_query(query, sort_key, id_column, descending=False):
+    """
+    Pagine une requête triée sur (sort_key, id)
+
+    - sans ?cursor= : pagination classique par numéro de page (OFFSET/LIMIT + COUNT)
+    - avec ?cursor= (vide pour partir du début) : pagination par curseur, coût constant quelle que soit la page
+    dans les deux cas next_cursor est renseigné pour continuer en mode curseur
+
+    sort_key : colonne ou expression de tri (non nulle), id_column : départage des égalités
+
+    la requête peut porter sur un modèle (Media.query) : les items sont des objets ORM
+    ou sur des colonnes (query.with_entities(...)) : les items sont les lignes, sans objets ORM à créer
+    """
+    page, per_page = get_pagination_params()
+    cursor = request.args.get('cursor')
+
+    # requête sur un modèle entier ou sur une liste de colonnes
+    descriptions = query.column_descriptions
+    entity_query = len(descriptions) == 1 and isinstance(descriptions[0]['expr'], type)
+
+    def item_of(row):
+        return row[0] if entity_query else row
+
+    # la valeur de tri est récupérée avec chaque ligne pour construire le curseur suivant
+    query = query.add_columns(sort_key.label('sort_key'))
+    if descending:
+        query = query.order_by(sort_key.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_key, id_column)
+
+    def cursor_after(row):
+        return encode_cursor(row.sort_key, getattr(item_of(row), id_column.key))
+
+    if cursor is None:
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        rows = pagination.items
+        pagination.items = [item_of(row) for row in rows]
+        pagination.next_cursor = cursor_after(rows[-1]) if rows and pagination.has_next else None
+        return pagination
+
+    if cursor:
+        sort_value, item_id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(tuple_(sort_key, id_column) < tuple_(sort_value, item_id))
+        else:
+            query = query.filter(tuple_(sort_key, id_column) > tuple_(sort_value, item_id))
+
+    # un élément de plus pour savoir s'il y a une suite, sans COUNT
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return KeysetPagination(
+        items=[item_of(row) for row in rows],
+        per_page=per_page,
+        cursor=cursor,
+        next_cursor=cursor_after(rows[-1]) if rows and has_next else None
+    )
+
+
+def paginated_response(pagination, serializer_func, extra=None, expand_func=None, fields=None):
     """
     pagination : informations sur la pagination (page actuelle, total, etc.)
     serializer_func : fonction qui transforme chaque élément en dico
-    total_real : nombre total personnalisé
+    extra : clés supplémentaires ajoutées à la réponse (ex : facets)
+    expand_func : fonction qui complète toute la liste sérialisée d'un coup (cf expand.py)
+    fields : champs à garder dans chaque élément (cf get_fields_params), None pour tout garder
     
     Ex de réponse :
     {
@@ -51,27 +199,48 @@ def paginated_response(pagination, serializer_func, total_real=None):
             "page": 1,
             "per_page": 20,
             "total": 50,
-            "pages": 3
+            "pages": 3,
+            "next_cursor": "WyJFeGVtcGxlIiwyXQ"
         }
     }
+
+    En mode curseur (KeysetPagination) il n'y a ni page ni total :
+        "pagination": {"per_page": 20, "cursor": "...", "next_cursor": "..."}
     """
-    # Utilise le total personnalisé sinon le total de la pagination
-    total = total_real if total_real is not None else pagination.total
-    per_page = pagination.per_page
-    
-    # Calcul du nombre total de pages
-    # Ex : 50 éléments / 20 par page = 3 pages
-    total_pages = (total + per_page - 1) // per_page if per_page > 0 else 1
-    
     # Transformation de chaque élément en dico JSON
     serialized_items = [serializer_func(item) for item in pagination.items]
-    
-    return jsonify({
-        'data': serialized_items,
-        'pagination': {
+    if expand_func:
+        serialized_items = expand_func(serialized_items)
+    if fields is not None:
+        serialized_items = [select_fields(item, fields) for item in serialized_items]
+    per_page = pagination.per_page
+
+    if isinstance(pagination, KeysetPagination):
+        pagination_info = {
+            'per_page': per_page,
+            'cursor': pagination.cursor,
+            'next_cursor': pagination.next_cursor
+        }
+    else:
+        total = pagination.total
+        
+        # Calcul du nombre total de pages
+        # Ex : 50 éléments / 20 par page = 3 pages
+        total_pages = (total + per_page - 1) // per_page if per_page > 0 else 1
+
+        pagination_info = {
             'page': pagination.page,
             'per_page': per_page,
             'total': total,
-            'pages': total_pages
+            'pages': total_pages,
+            'next_cursor': getattr(pagination, 'next_cursor', None)
         }
-    }), 200
\ No newline at end of file
+
+    response = {
+        'data': serialized_items,
+        'pagination': pagination_info
+    }
+    if extra:
+        response.update(extra)
+
+    return jsonify(response), 200
\ No newline at end of file
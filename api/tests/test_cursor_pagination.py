@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import cast, func, text, REAL
+from error_handler import APIError
+from routes.utils import encode_cursor, decode_cursor, paginate_query, relevance_key
+
+
+@pytest.mark.parametrize('sort_value', [42, 'Le Seigneur des anneaux', 0.0607927, 1 / 3, None])
+def test_cursor_round_trip(sort_value):
+    assert decode_cursor(encode_cursor(sort_value, 7)) == (sort_value, 7)
+
+
+def test_cursor_dates_are_sent_back_as_text():
+    created_at = datetime(2024, 3, 1, 12, 30, 5, 123456)
+    assert decode_cursor(encode_cursor(created_at, 7)) == (str(created_at), 7)
+
+
+@pytest.mark.parametrize('cursor', ['pas-un-curseur', encode_cursor('a', 1)[:-3], 'W10'])
+def test_invalid_cursor(cursor):
+    with pytest.raises(APIError) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def walk(client, url):
+    """suit next_cursor depuis le début, retourne les ids dans l'ordre"""
+    ids, cursor = [], ''
+    while cursor is not None:
+        response = client.get(f'{url}&cursor={cursor}')
+        assert response.status_code == 200
+        body = response.get_json()
+        ids += [item['id'] for item in body['data']]
+        cursor = body['pagination']['next_cursor']
+    return ids
+
+
+def pages(client, url):
+    """mêmes résultats par numéro de page"""
+    ids, page = [], 1
+    while True:
+        body = client.get(f'{url}&page={page}').get_json()
+        ids += [item['id'] for item in body['data']]
+        if page >= body['pagination']['pages']:
+            return ids
+        page += 1
+
+
+@pytest.mark.parametrize('sort', ['id', 'title', 'recent'])
+def test_search_media_cursor_walk(client, add_media, sort):
+    # titres et dates en double : le départage se fait sur l'id
+    start = datetime(2024, 1, 1)
+    medias = add_media(10, title='Doublon', created_at=start) + [
+        media for index in range(15)
+        for media in add_media(1, created_at=start + timedelta(microseconds=index * 37))
+    ]
+
+    url = f'/api/search/media?sort={sort}&per_page=4'
+    ids = walk(client, url)
+    assert sorted(ids) == sorted(media.id for media in medias)
+    assert ids == pages(client, url)
+
+
+def test_relevance_cursor_walk(app, add_media):
+    """les scores de pertinence sont des real : la clé de tri doit survivre au passage par le JSON du curseur"""
+    from models.media import Media
+
+    medias = add_media(40)
+    # un score real par média, comme ts_rank_cd / similarity
+    score = relevance_key(cast(func.length(Media.title) / (Media.id % 7 + 3.0), REAL))
+
+    ids, cursor = [], ''
+    while cursor is not None:
+        with app.test_request_context(f'/?per_page=6&cursor={cursor}'):
+            pagination = paginate_query(Media.query, score, Media.id, descending=True)
+            ids += [media.id for media in pagination.items]
+            cursor = pagination.next_cursor
+    assert sorted(ids) == sorted(media.id for media in medias)
+
+
+def test_search_media_relevance_cursor_walk(client, db_session, add_media):
+    """sort=relevance de bout en bout (recherche contains : similarity, extension pg_trgm)"""
+    try:
+        db_session.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+        pytest.skip("extension pg_trgm indisponible")
+
+    medias = add_media(12, title='Dune') + add_media(12, title='Dune partie deux') + add_media(12)
+    url = '/api/search/media?q=Dune&mode=contains&sort=relevance&per_page=5'
+    ids = walk(client, url)
+    assert sorted(ids) == sorted(media.id for media in medias[:24])
+    assert ids == pages(client, url)
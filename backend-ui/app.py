@@ -1,6 +1,8 @@
 import os
 from flask import Flask, render_template
+from flask_compress import Compress
 from utils.utils import get_current_user
+from utils.json_provider import FastJSONProvider
 from routes.auth import auth_bp
 from routes.pages import pages_bp
 from routes.admin import admin_bp
@@ -11,30 +13,45 @@ from routes.add_media import add_media_bp
 from routes.libraries import libraries_bp
 from routes.franchises import franchises_bp
 
-app = Flask(__name__)
-app.secret_key = os.environ.get('SECRET_KEY_UI')
+def create_app():
+    """Fabrique de l'application : utilisée par gunicorn (gunicorn.conf.py) et par python app.py en développement"""
+    app = Flask(__name__)
+    # encodeur / décodeur JSON rapide (orjson), cf utils/json_provider.py
+    app.json = FastJSONProvider(app)
 
-app.register_blueprint(add_media_bp, url_prefix='/add-media')
-app.register_blueprint(franchises_bp, url_prefix='/franchises')
-app.register_blueprint(admin_bp, url_prefix='/admin')
-app.register_blueprint(auth_bp)
-app.register_blueprint(libraries_bp)
-app.register_blueprint(media_bp, url_prefix='/media')
-app.register_blueprint(pages_bp)
-app.register_blueprint(persons_bp, url_prefix='/persons')
-app.register_blueprint(profile_bp, url_prefix='/profile')
+    # compression brotli / gzip des pages HTML selon l'Accept-Encoding du navigateur
+    # nginx ne recompresse pas une réponse déjà compressée, il ne gzip que ce qui arrive en clair (statiques)
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+    app.config['COMPRESS_BR_LEVEL'] = int(os.getenv('COMPRESS_BR_LEVEL', 4))
+    Compress(app)
+    app.secret_key = os.environ.get('SECRET_KEY_UI')
 
-@app.context_processor
-def inject_user():
-    return {'current_user': get_current_user()}
+    app.register_blueprint(add_media_bp, url_prefix='/add-media')
+    app.register_blueprint(franchises_bp, url_prefix='/franchises')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(libraries_bp)
+    app.register_blueprint(media_bp, url_prefix='/media')
+    app.register_blueprint(pages_bp)
+    app.register_blueprint(persons_bp, url_prefix='/persons')
+    app.register_blueprint(profile_bp, url_prefix='/profile')
 
-@app.errorhandler(404)
-def page_not_found(error):
-    return render_template('error.html', error_code=404, error_message="Page non trouvée"), 404
+    @app.context_processor
+    def inject_user():
+        return {'current_user': get_current_user()}
 
-@app.errorhandler(500)
-def internal_server_error(error):
-    return render_template('error.html', error_code=500, error_message="Erreur interne du serveur"), 500
+    @app.errorhandler(404)
+    def page_not_found(error):
+        return render_template('error.html', error_code=404, error_message="Page non trouvée"), 404
+
+    @app.errorhandler(500)
+    def internal_server_error(error):
+        return render_template('error.html', error_code=500, error_message="Erreur interne du serveur"), 500
+
+    return app
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=os.environ.get('PORT_UI'))
+    # serveur de développement flask, en production c'est gunicorn (cf gunicorn.conf.py)
+    create_app().run(debug=os.getenv('FLASK_DEBUG', '1') == '1', host='0.0.0.0', port=os.environ.get('PORT_UI'))
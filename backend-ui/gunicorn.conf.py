@@ -0,0 +1,29 @@
+import os
+import multiprocessing
+
+"""
+Configuration gunicorn de l'ui : gunicorn -c gunicorn.conf.py "app:create_app()"
+mêmes variables que l'api (GUNICORN_WORKERS, GUNICORN_THREADS, GUNICORN_PRELOAD, GUNICORN_MAX_REQUESTS,
+GUNICORN_RELOAD), cf api/gunicorn.conf.py
+
+l'ui attend surtout les réponses de l'api : des threads (gthread) sont plus économes que des processus
+"""
+
+bind = f"0.0.0.0:{os.getenv('PORT_UI', '80')}"
+
+workers = int(os.getenv('GUNICORN_WORKERS') or multiprocessing.cpu_count() * 2 + 1)
+threads = int(os.getenv('GUNICORN_THREADS') or 4)
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+reload = os.getenv('GUNICORN_RELOAD', '0') == '1'
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1' and not reload
+
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS') or 1000)
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER') or 100)
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT') or 30)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
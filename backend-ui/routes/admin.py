@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, redirect, request
-from utils.utils import is_admin, is_real_admin, get_current_user, get_int_or_default
+from utils.utils import is_admin, is_real_admin, get_current_user, refresh_current_user, get_int_or_default
 from utils.utils_api import api_post, api_patch, api_delete, api_search
 
 admin_bp = Blueprint('admin', __name__)
@@ -226,6 +226,9 @@ def admin_users():
                 response = api_patch(f'/users/{user_id}', data=data)
                 
                 if response.status_code == 200:
+                    #l'admin a modifié son propre compte (ex : rôle)
+                    if user_id == get_current_user()['id']:
+                        refresh_current_user()
                     messages = ['success', 'Utilisateur modifié avec succès']
                 else:
                     messages = ['danger', 'Erreur lors de la modification']
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, redirect, request, session
-from utils.utils import get_current_user
+from utils.utils import get_current_user, refresh_current_user
 from utils.utils_api import api_post
 
 auth_bp = Blueprint('auth', __name__)
@@ -27,6 +27,7 @@ def login():
                 response = api_post('/login',data={'email': email, 'password': password})
                 if response.status_code == 200:
                     session['auth_token'] = response.json().get('token')
+                    refresh_current_user()
                     #L'utilisateur est connecté on le met à l'accueil
                     return redirect('/')
                 else:
@@ -61,6 +62,7 @@ def register():
                 response = api_post('/register', data={'username': username, 'email': email, 'password': password})
                 if response.status_code == 201:
                     session['auth_token'] = response.json().get('token')
+                    refresh_current_user()
                     #L'utilisateur est inscrit on le met à l'accueil
                     return redirect('/')
                 else:
@@ -10,17 +10,11 @@ def libraries():
     page = get_int_or_default(request.args.get('page', 1), 1)
 
     try:
-        library_items, pagination = api_search('libraries', '', page, 18)
+        #expand=owner : l'api intègre le propriétaire de chaque vidéothèque, plus d'appel /users par ligne
+        library_items, pagination = api_search('libraries', '', page, 18, expand='owner')
         if library_items and pagination:
-            # récupérer l'username du propriétaire
             for library in library_items:
-                try:
-                    response = api_get(f'/users/{library['owner_id']}')
-                    if response.status_code == 200:
-                        data_response = response.json()
-                        library['owner'] = data_response.get('username', '-')
-                except:
-                    library['owner'] = '-'
+                library['owner'] = (library.get('owner') or {}).get('username') or '-'
         else:
             library_items = []
             pagination = {}
@@ -111,9 +105,10 @@ def library(library_id):
 
     #Récupération d'une librairie
     try:
-        response = api_get(f'/libraries/{library_id}')
+        response = api_get(f'/libraries/{library_id}?expand=owner')
         if response.status_code == 200:
             library_data = response.json()
+            library_data['owner'] = (library_data.get('owner') or {}).get('username') or '-'
             is_owner = current_user.get('id') == library_data.get('owner_id') or is_admin
     except:
         is_owner = False
@@ -140,12 +135,6 @@ def library(library_id):
     # Affichage normal (GET)
     try:
         if library_data and library_data.get('owner_id'):
-            # récupération proprio
-            owner_id = library_data.get('owner_id')
-            response = api_get(f'/users/{owner_id}')
-            if response.status_code == 200:
-                library_data['owner'] = response.json().get('username', '-')
-            
             #récupération média
             response = api_get(f'/search/media?q=&library_id={library_id}&page={page}&per_page=10')
             if response.status_code == 200:
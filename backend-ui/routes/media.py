@@ -14,17 +14,22 @@ def media():
     genre_id = get_int_or_default(request.args.get('genre_id'))
     media_items = []
     pagination = {}
+    facets = {}
     
     try:
-        response = api_get(f'/search/media?q={search_query}&page={page}&per_page=24&franchise_id={franchise_id}&genre_id={genre_id}')
+        #les facettes genre donnent le nombre de médias par genre pour la recherche en cours
+        #fields : la grille n'affiche que la vignette, le titre, le type et l'année (pas de synopsis)
+        fields = 'id,title,type,cover_image_url,release_year'
+        response = api_get(f'/search/media?q={search_query}&page={page}&per_page=24&franchise_id={franchise_id}&genre_id={genre_id}&facets=genre&fields={fields}')
         if response.status_code == 200:
             data = response.json()
             media_items = data.get('data', [])
             pagination = data.get('pagination', {})
+            facets = data.get('facets', {})
     except:
         return render_template('error.html', error_code=404, error_message="Impossible de charger les informations"), 500
     
-    return render_template('media/media.html', media_items=media_items, pagination=pagination, search_query=search_query, current_page=page, franchise_id=franchise_id, genre_id=genre_id)
+    return render_template('media/media.html', media_items=media_items, pagination=pagination, search_query=search_query, current_page=page, franchise_id=franchise_id, genre_id=genre_id, facets=facets)
 
 #PAGE MEDIA DETAILLEE
 @media_bp.route('/<int:media_id>', methods=['GET'])
@@ -36,25 +41,13 @@ def media_details(media_id):
     franchise_data = None
 
     try:
-        response = api_get(f'/media/{media_id}')
+        # un seul appel : la vidéothèque, la franchise et le casting sont intégrés par l'api
+        response = api_get(f'/media/{media_id}?expand=library,franchise,cast')
         if response.status_code == 200:
             media_data = response.json()
-            
-            if media_data and media_data.get('library_id'):
-                lib_id = media_data.get('library_id')
-                response = api_get(f'/libraries/{lib_id}')
-                if response.status_code == 200:
-                    library_data = response.json()
-            
-            if media_data and media_data.get('franchise_id'):
-                franchise_id = media_data.get('franchise_id')
-                response = api_get(f'/franchises/{franchise_id}')
-                if response.status_code == 200:
-                    franchise_data = response.json()
-            
-            response = api_get(f'/media/{media_id}/persons')
-            if response.status_code == 200:
-                persons = response.json()
+            library_data = media_data.get('library')
+            franchise_data = media_data.get('franchise')
+            persons = media_data.get('cast', [])
         elif response.status_code == 403:
             # Accès refusé car le médai est privée ou utilisateur n'a pas les droits
             return render_template('error.html', error_code=403, error_message="Accès refusé à ce média"), 403
@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, redirect, request, session
-from utils.utils import get_current_user, get_int_or_default
+from utils.utils import get_current_user, refresh_current_user, get_int_or_default
 from utils.utils_api import api_get, api_post, api_delete, api_patch
 
 profile_bp = Blueprint('profile', __name__)
@@ -42,6 +42,8 @@ def profile(user_id=None):
                 try:
                     response = api_patch(f'/users/{current_user['id']}', data=data)
                     if response.status_code == 200:
+                        #nouveau pseudo / email / bio dans la page et le menu
+                        current_user = refresh_current_user()
                         messages = ['success', 'Profil modifié avec succès']
                     else:
                         messages = ['danger', 'Erreur lors de la modification']
@@ -55,21 +57,15 @@ def profile(user_id=None):
         if response.status_code == 200:
             profile_user = response.json()
         
-        response = api_get(f'/search/libraries?q=&owner_id={requested_user_id}&page={page}&per_page=10')
+        response = api_get(f'/search/libraries?q=&owner_id={requested_user_id}&page={page}&per_page=10&expand=owner')
         if response.status_code == 200:
             data = response.json()
             libraries = data.get('data', [])
             pagination = data.get('pagination', {})
             
-            # récupérer l'username du propriétaire
+            # le propriétaire est intégré par l'api (expand=owner)
             for library in libraries:
-                try:
-                    response = api_get(f'/users/{library['owner_id']}')
-                    if response.status_code == 200:
-                        data_response = response.json()
-                        library['owner'] = data_response.get('username', '-')
-                except:
-                    library['owner'] = '-'
+                library['owner'] = (library.get('owner') or {}).get('username') or '-'
     except:
         return render_template('error.html', error_code=404, error_message="Impossible de charger les informations"), 500
     
@@ -0,0 +1,65 @@
+import os
+import datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+"""
+Encodeur JSON de l'ui (même fichier que api/json_provider.py) : utilisé par jsonify, le filtre tojson
+des templates et api_json pour décoder les réponses de l'api
+
+orjson (si installé) encode bien plus vite que le module json de la lib standard
+JSON_PROVIDER=std force l'encodeur standard (ex : pour comparer les deux)
+
+dans les deux cas datetime, date et time sont écrits au format ISO 8601 ("2024-05-01T10:00:00")
+et pas au format HTTP que flask utilise par défaut pour les dates
+les clés ne sont pas triées : l'ordre est celui des dicos construits par les to_dict
+"""
+
+
+def _default(obj):
+    """types que le json standard ne sait pas écrire"""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    # Decimal, UUID, dataclasses, ... : même traitement que flask
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    default = staticmethod(_default)
+    sort_keys = False
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.use_orjson = orjson is not None and os.getenv('JSON_PROVIDER', 'orjson') != 'std'
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        # même règle que flask : JSON indenté en mode debug
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # des options spécifiques au json standard (indent, ...) : on le laisse faire
+        if not self.use_orjson or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        if not self.use_orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if not self.use_orjson:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # orjson produit directement des bytes, pas de passage par une str
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self._orjson_options()),
+            mimetype=self.mimetype
+        )
@@ -1,24 +1,53 @@
 import requests
-from flask import session
+from flask import session, g
 import os
+import time
 import uuid
 import re
-from utils.utils_api import api_search, API_BASE_URL
+from utils.utils_api import api_search, api_headers, API_BASE_URL
 
 
-#Donne l'utilisateur actuel
-def get_current_user():
-    if 'auth_token' not in session:
-        return None
+#Profil de l'utilisateur connecté gardé dans la session (cookie signé) pendant PROFILE_CACHE_SECONDS
+#et mémorisé sur g : une page ne fait au plus qu'un appel à /me au lieu d'un par get_current_user / is_admin / template
+#après une modification du profil ou une connexion appeler refresh_current_user
+PROFILE_CACHE_SECONDS = int(os.getenv('PROFILE_CACHE_SECONDS') or 60)
+
+#Appel à /me
+def fetch_current_user():
     try:
-        headers = {'Authorization': f"Bearer {session['auth_token']}"}
-        response = requests.get(f'{API_BASE_URL}/me', headers=headers)
+        response = requests.get(f'{API_BASE_URL}/me', headers=api_headers())
         if response.status_code == 200:
             return response.json()
     except:
         return None
     return None
 
+#Donne l'utilisateur actuel
+def get_current_user():
+    if 'auth_token' not in session:
+        return None
+    if 'current_user' in g:
+        return g.current_user
+
+    cached = session.get('profile')
+    if cached and cached.get('expires_at', 0) > time.time():
+        g.current_user = cached['user']
+        return g.current_user
+
+    user = fetch_current_user()
+    if user:
+        session['profile'] = {'user': user, 'expires_at': time.time() + PROFILE_CACHE_SECONDS}
+    else:
+        session.pop('profile', None)
+    g.current_user = user
+    return user
+
+#Oublie le profil gardé et le recharge depuis l'api
+def refresh_current_user():
+    g.pop('current_user', None)
+    session.pop('profile', None)
+    return get_current_user()
+
 #Donne si il est admin ou trusted
 def is_admin():
     user = get_current_user()
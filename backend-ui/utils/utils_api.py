@@ -1,17 +1,64 @@
 import requests
-from flask import session
+import threading
+from collections import OrderedDict
+from flask import session, current_app
 import os
 
 API_BASE_URL = f'http://backend-api:{os.getenv('PORT_API')}/api'
 #Si on veux contacter l'api par l'extérieur il faut faire http://nginx/api
 
-#GET sur l'api
-def api_get(endpoint):
-    url = f"{API_BASE_URL}{endpoint}"
+#Dernières réponses GET de l'api avec leur ETag : on renvoie l'ETag (If-None-Match) et si l'api répond 304
+#on réutilise la réponse gardée, l'api n'a alors rien sérialisé ni envoyé
+#clé (url, token) pour qu'un utilisateur ne récupère jamais la réponse d'un autre
+API_ETAG_CACHE_SIZE = int(os.getenv('API_ETAG_CACHE_SIZE', 256))
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+#En-têtes communs : jeton et, juste après une écriture, X-Primary-Until renvoyé par l'api
+#pour que l'utilisateur relise ses modifications sur la base principale et pas sur un réplica en retard
+def api_headers(content_type=None):
     headers = {}
+    if content_type:
+        headers['Content-Type'] = content_type
     if 'auth_token' in session:
         headers['Authorization'] = f"Bearer {session['auth_token']}"
-    return requests.get(url, headers=headers)
+    if 'primary_until' in session:
+        headers['X-Primary-Until'] = session['primary_until']
+    return headers
+
+#Garde la date de X-Primary-Until d'une réponse à une écriture
+def remember_primary_pin(response):
+    if response.headers.get('X-Primary-Until'):
+        session['primary_until'] = response.headers['X-Primary-Until']
+    return response
+
+#GET sur l'api
+def api_get(endpoint):
+    url = f"{API_BASE_URL}{endpoint}"
+    headers = api_headers()
+    token = session.get('auth_token')
+
+    cache_key = (url, token)
+    with _etag_lock:
+        cached = _etag_cache.get(cache_key)
+    if cached is not None:
+        headers['If-None-Match'] = cached.headers['ETag']
+
+    response = requests.get(url, headers=headers)
+
+    if response.status_code == 304 and cached is not None:
+        with _etag_lock:
+            if cache_key in _etag_cache:
+                _etag_cache.move_to_end(cache_key)
+        return cached
+
+    if response.status_code == 200 and response.headers.get('ETag'):
+        with _etag_lock:
+            _etag_cache[cache_key] = response
+            _etag_cache.move_to_end(cache_key)
+            while len(_etag_cache) > API_ETAG_CACHE_SIZE:
+                _etag_cache.popitem(last=False)
+    return response
 
 #GET sur l'api TMDB
 def api_get_tmdb(endpoint):
@@ -22,33 +69,36 @@ def api_get_tmdb(endpoint):
 #POST sur l'api
 def api_post(endpoint, data=None):
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {'Content-Type': 'application/json'}
-    if 'auth_token' in session:
-        headers['Authorization'] = f"Bearer {session['auth_token']}"
-    return requests.post(url, json=data, headers=headers)
+    headers = api_headers('application/json')
+    return remember_primary_pin(requests.post(url, json=data, headers=headers))
 
 #PATCH sur l'api
 def api_patch(endpoint, data=None):
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {'Content-Type': 'application/json'}
-    if 'auth_token' in session:
-        headers['Authorization'] = f"Bearer {session['auth_token']}"
-    return requests.patch(url, json=data, headers=headers)
+    headers = api_headers('application/json')
+    return remember_primary_pin(requests.patch(url, json=data, headers=headers))
 
 #API DELETE
 def api_delete(endpoint):
     url = f"{API_BASE_URL}{endpoint}"
-    headers = {}
-    if 'auth_token' in session:
-        headers['Authorization'] = f"Bearer {session['auth_token']}"
-    return requests.delete(url, headers=headers)
+    headers = api_headers()
+    return remember_primary_pin(requests.delete(url, headers=headers))
+
+#Décodage d'une réponse de l'api avec le décodeur de l'application (orjson si dispo)
+#plus rapide que response.json() pour les grosses listes
+def api_json(response):
+    return current_app.json.loads(response.content)
 
 #API Recherche simple
-def api_search(base, query=None, page=1, per_page=10):
+def api_search(base, query=None, page=1, per_page=10, expand=None):
     try:
-        response = api_get(f'/search/{base}?q={query}&page={page}&per_page={per_page}')
+        #expand : relations intégrées par l'api dans chaque élément (ex : owner)
+        url = f'/search/{base}?q={query}&page={page}&per_page={per_page}'
+        if expand:
+            url += f'&expand={expand}'
+        response = api_get(url)
         if response.status_code == 200:
-            data = response.json()
+            data = api_json(response)
             content = data.get('data', [])
             pagination = data.get('pagination', {})
             return content, pagination
@@ -1,3 +1,12 @@
+-- Extensions pour la recherche (accents et trigrammes)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() n'est pas IMMUTABLE, on l'enveloppe pour pouvoir l'utiliser dans les index et le tsvector
+CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text AS $$
+    SELECT public.unaccent('public.unaccent', $1)
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;
+
 -- Création table users
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
@@ -26,6 +35,9 @@ CREATE TABLE IF NOT EXISTS franchises (
     description TEXT
 );
 
+CREATE INDEX IF NOT EXISTS franchises_name_trgm_idx ON franchises USING GIN (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS franchises_description_trgm_idx ON franchises USING GIN (description gin_trgm_ops);
+
 -- Création table media
 CREATE TABLE IF NOT EXISTS media (
     id SERIAL PRIMARY KEY,
@@ -40,9 +52,31 @@ CREATE TABLE IF NOT EXISTS media (
     franchise_id INT REFERENCES franchises(id) ON DELETE SET NULL,
     franchise_order INT,
     visibility VARCHAR(20) NOT NULL CHECK (visibility IN ('public', 'private')),
-    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    search_vector TSVECTOR
 );
 
+-- Maintien du tsvector de recherche (titre en poids A, synopsis en poids B)
+-- init.sql ne tourne que sur un volume vide : une base existante reçoit la colonne, le trigger et le calcul
+-- des médias déjà enregistrés par la migration 0001_baseline (flask --app app db upgrade)
+-- config french pour les racines des mots et simple pour les noms propres
+CREATE OR REPLACE FUNCTION media_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('french', immutable_unaccent(coalesce(NEW.title, ''))), 'A') ||
+        setweight(to_tsvector('simple', immutable_unaccent(coalesce(NEW.title, ''))), 'A') ||
+        setweight(to_tsvector('french', immutable_unaccent(coalesce(NEW.synopsis, ''))), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER media_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, synopsis ON media
+    FOR EACH ROW EXECUTE FUNCTION media_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS media_search_vector_idx ON media USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS media_title_trgm_idx ON media USING GIN (title gin_trgm_ops);
+
 -- Création table persons (Acteurs, Réalisateurs, etc.)
 CREATE TABLE IF NOT EXISTS persons (
     id SERIAL PRIMARY KEY,
@@ -50,6 +84,8 @@ CREATE TABLE IF NOT EXISTS persons (
     birthdate DATE
 );
 
+CREATE INDEX IF NOT EXISTS persons_name_trgm_idx ON persons USING GIN (name gin_trgm_ops);
+
 -- Création table media_persons (Table de liaison Média à Personnes)
 CREATE TABLE IF NOT EXISTS media_persons (
     media_id INT NOT NULL REFERENCES media(id) ON DELETE CASCADE,